@@ -0,0 +1,54 @@
+import argparse
+import time
+import tracemalloc
+from motogpdata.data import event_track_info, rider_summary, career_table
+from motogpdata.handler import Season, Event
+from motogpdata.replay import ReplayServer
+
+
+def bench(label, server, func):
+    # a fresh catalog per run, so nothing is served from a previous run's memo
+    catalog = server.catalog()
+    requests_before = server.requests
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    func(catalog)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<36} {elapsed:8.2f} s  {server.requests - requests_before:6d} requests  "
+          f"{peak / 1024 ** 2:8.1f} MiB peak")
+
+
+def race_analysis_serial(catalog, year):
+    season = Season(year, 'MotoGP', catalog=catalog)
+    for short_name in season.events_list:
+        try:
+            Event(season, short_name).race_analysis(performance=True)
+        except Exception:
+            pass
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark crawls against recorded fixtures.")
+    parser.add_argument('--fixtures', default='fixtures')
+    parser.add_argument('--start', type=int, default=2020)
+    parser.add_argument('--end', type=int, default=2023)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--riders', nargs='+', default=['Francesco Bagnaia', 'Fabio Quartararo', 'Jack Miller'])
+    args = parser.parse_args()
+    seasons = list(range(args.start, args.end))
+
+    with ReplayServer(args.fixtures, latency=args.latency, jitter=args.jitter) as server:
+        for workers in (1, 8, 32):
+            bench(f"event_track_info max_workers={workers}", server,
+                  lambda c: event_track_info('MotoGP', args.start, args.end, max_workers=workers, catalog=c))
+        bench(f"rider_summary x{len(args.riders)}", server,
+              lambda c: [rider_summary(r, 'MotoGP', seasons, catalog=c) for r in args.riders])
+        for workers in (1, 8):
+            bench(f"career_table max_workers={workers}", server,
+                  lambda c: career_table(args.riders, seasons=seasons, max_workers=workers, catalog=c))
+        bench(f"race_analysis {args.start} serial", server, lambda c: race_analysis_serial(c, args.start))
+        bench(f"race_analysis_all {args.start}", server,
+              lambda c: Season(args.start, 'MotoGP', catalog=c).race_analysis_all())
@@ -0,0 +1,25 @@
+import statistics
+import subprocess
+import sys
+
+# runs in a fresh interpreter: any socket connection during import fails the benchmark
+PROBE = """
+import socket, sys, time
+def connect(*args, **kwargs):
+    raise RuntimeError('network access during import')
+socket.socket.connect = connect
+t0 = time.perf_counter()
+import motogpdata.data
+elapsed = time.perf_counter() - t0
+heavy = [name for name in ('pandas', 'numpy', 'requests', 'PyPDF2', 'tqdm', 'pyarrow') if name in sys.modules]
+print(elapsed, ','.join(heavy))
+"""
+
+if __name__ == '__main__':
+    runs = []
+    for _ in range(10):
+        out = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True).stdout.split()
+        runs.append(float(out[0]))
+    heavy = out[1] if len(out) > 1 else 'none'
+    print(f"import motogpdata.data: median {statistics.median(runs) * 1000:.1f} ms, "
+          f"min {min(runs) * 1000:.1f} ms over {len(runs)} runs; heavy modules loaded: {heavy}")
@@ -0,0 +1,25 @@
+import time
+import numpy as np
+import pandas as pd
+from motogpdata.timecodec import parse_times, parse_gaps, format_times
+
+
+def bench(label, func, values):
+    t0 = time.perf_counter()
+    func(values)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<28} {len(values):>10,} values  {elapsed:8.3f} s  {len(values) / elapsed:14,.0f} values/s")
+
+
+if __name__ == '__main__':
+    n = 2_000_000
+    rng = np.random.default_rng(0)
+    seconds = rng.uniform(85, 125, n)
+    laptimes = pd.Series(format_times(seconds, sep="'"))
+    racetimes = pd.Series(format_times(seconds * 22))
+    gaps = pd.Series(np.where(rng.random(n) < 0.05, '+1 Lap', pd.Series(rng.uniform(0, 40, n)).map('+{:.3f}'.format)))
+
+    bench("parse_times M'SS.fff", parse_times, laptimes)
+    bench("parse_times M:SS.fff", parse_times, racetimes)
+    bench("parse_gaps", parse_gaps, gaps)
+    bench("format_times", format_times, seconds)
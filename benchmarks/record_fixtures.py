@@ -0,0 +1,24 @@
+import argparse
+from motogpdata.catalog import Catalog
+from motogpdata.data import event_track_info, career_table
+from motogpdata.handler import Season
+from motogpdata.replay import Recorder
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Record motogp.com responses used by the benchmarks.")
+    parser.add_argument('--out', default='fixtures')
+    parser.add_argument('--start', type=int, default=2020)
+    parser.add_argument('--end', type=int, default=2023)
+    parser.add_argument('--category', default='MotoGP')
+    parser.add_argument('--max-workers', type=int, default=8)
+    args = parser.parse_args()
+
+    catalog = Recorder(args.out).attach(Catalog())
+    event_track_info(args.category, args.start, args.end, max_workers=args.max_workers, catalog=catalog)
+    career_table(categories=[args.category], seasons=range(args.start, args.end),
+                 max_workers=args.max_workers, catalog=catalog)
+
+    for year in range(args.start, args.end):
+        errors = Season(year, args.category, catalog=catalog).race_analysis_all(max_workers=args.max_workers)[2]
+        if not errors.empty:
+            print(errors)
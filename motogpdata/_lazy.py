@@ -0,0 +1,20 @@
+import importlib
+
+
+class _LazyModule:
+    # stands in for a heavy module until one of its attributes is first used
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        # later lookups hit the copied attributes directly
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
+
+
+def lazy_import(name: str):
+    return _LazyModule(name)
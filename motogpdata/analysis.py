@@ -0,0 +1,78 @@
+import io
+import re
+from ._lazy import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+TIMESHEET_COLUMNS = ['rider', 'lap', 'laptime_str', 't1', 't2', 't3', 't4', 'speed']
+
+# position of each timesheet column in a split laptime row
+_FIELDS = {'laptime_str': 0, 'lap': 1, 't1': 2, 't2': 3, 't3': 4, 'speed': 5, 't4': 6}
+
+_DECIMAL = re.compile(r"\d+\.\d+")
+_LETTERS = re.compile("[a-zA-Z]")
+
+
+class AnalysisParser:
+    def lines(self, pdf_data: bytes):
+        from PyPDF2 import PdfReader
+
+        for page in PdfReader(io.BytesIO(pdf_data)).pages:
+            yield from page.extract_text().splitlines()
+
+    def parse(self, pdf_data: bytes):
+        columns = {col: [] for col in _FIELDS}
+
+        def add_row(row):
+            fields = row.split(' ')
+            for col, pos in _FIELDS.items():
+                columns[col].append(fields[pos] if pos < len(fields) else None)
+
+        for line in self.lines(pdf_data):
+            if "'" in line and 'Page' not in line and _DECIMAL.search(line):
+                line = _LETTERS.sub('', line.strip(' * *'))
+                first = line.find("'")
+                second = line.find("'", first + 1)
+                if second != -1 and line.find("'", second + 1) == -1:
+                    # two laps printed side by side on the same line
+                    add_row(line[:second - 1])
+                    add_row(line[second - 1:])
+                else:
+                    add_row(line)
+
+        return {col: np.array(values, dtype=object) for col, values in columns.items()}
+
+
+def parse_analysis(pdf_data: bytes):
+    # top level function, so it can run on a process pool; riders are assigned later from the classification
+    return AnalysisParser().parse(pdf_data)
+
+
+def build_timesheet(columns: dict, riders: list, total_laps: list):
+    # laptime rows are listed rider after rider, in classification order
+    n_rows = len(columns['lap'])
+    offset = 0
+    starts, stops = [], []
+    for laps in total_laps:
+        laps = int(laps) if laps == laps and laps else 0
+        if laps and offset + laps <= n_rows:
+            starts.append(offset)
+            stops.append(offset + laps)
+            offset += laps
+        else:
+            starts.append(offset)
+            stops.append(n_rows)
+
+    lengths = np.array(stops, dtype=int) - np.array(starts, dtype=int)
+    rows = np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)] or [np.array([], dtype=int)])
+
+    return pd.DataFrame({
+        'rider': np.repeat(np.array(riders, dtype=object), lengths),
+        'lap': columns['lap'][rows].astype(int),
+        'laptime_str': columns['laptime_str'][rows],
+        't1': columns['t1'][rows].astype(float),
+        't2': columns['t2'][rows].astype(float),
+        't3': columns['t3'][rows].astype(float),
+        't4': columns['t4'][rows].astype(float),
+        'speed': columns['speed'][rows].astype(float),
+    }, columns=TIMESHEET_COLUMNS)
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+# endpoint templates, matched against the full request url
+_ENDPOINTS = [
+    ('seasons', re.compile(r"/results-api/seasons\b")),
+    ('events', re.compile(r"/results-api/season/[^/]+/events\b")),
+    ('categories', re.compile(r"/(results-api/event/[^/]+|riders-api/season/\d+)/categories\b")),
+    ('riders', re.compile(r"/riders-api/season/\d+/riders\b")),
+    ('sessions', re.compile(r"/results-api/event/[^/]+/category/[^/]+/sessions\b")),
+    ('classifications', re.compile(r"/results-api/session/[^/]+/classifications\b")),
+    ('analysis', re.compile(r"/Analysis\.pdf$")),
+]
+
+# seconds before an entry goes stale, None means the entry never expires.
+# official results do not change once published; 'live' applies to responses stored with immutable=False,
+# e.g. the classification of a session that is not official yet.
+DEFAULT_TTLS = {
+    'seasons': 6 * 3600,
+    'events': 3600,
+    'categories': 24 * 3600,
+    'riders': 24 * 3600,
+    'sessions': None,
+    'classifications': None,
+    'analysis': None,
+    'other': 3600,
+    'live': 60,
+}
+
+
+def _endpoint(url):
+    for name, pattern in _ENDPOINTS:
+        if pattern.search(url):
+            return name
+    return 'other'
+
+
+class ResponseCache:
+    def __init__(self,
+                 path: str = os.path.join(os.path.expanduser('~'), '.cache', 'motogpdata', 'responses.sqlite'),
+                 max_bytes: int = 2 * 1024 ** 3,
+                 ttls: dict = None,
+                 offline: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.offline = offline
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            # response bodies are stored once per content digest, urls point to them
+            self._db.execute("CREATE TABLE IF NOT EXISTS blobs "
+                             "(digest TEXT PRIMARY KEY, body BLOB, size INTEGER)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS urls "
+                             "(url TEXT PRIMARY KEY, digest TEXT, endpoint TEXT, stored REAL, accessed REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS urls_accessed ON urls (accessed)")
+            # caches created before the immutable column was added
+            if 'immutable' not in [row[1] for row in self._db.execute("PRAGMA table_info(urls)")]:
+                self._db.execute("ALTER TABLE urls ADD COLUMN immutable INTEGER NOT NULL DEFAULT 1")
+
+    def get(self, url: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT urls.digest, urls.endpoint, urls.stored, urls.immutable, blobs.body FROM urls "
+                "JOIN blobs ON urls.digest = blobs.digest WHERE urls.url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            digest, endpoint, stored, immutable, body = row
+            ttl = self.ttls.get(endpoint)
+            if ttl is None and not immutable:
+                ttl = self.ttls['live']
+            now = time.time()
+            if not self.offline and ttl is not None and now - stored > ttl:
+                return None
+            with self._db:
+                self._db.execute("UPDATE urls SET accessed = ? WHERE url = ?", (now, url))
+            return body
+
+    def put(self, url: str, body: bytes, immutable: bool = True):
+        digest = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)", (digest, body, len(body)))
+            self._db.execute("INSERT OR REPLACE INTO urls (url, digest, endpoint, stored, accessed, immutable) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", (url, digest, _endpoint(url), now, now, int(immutable)))
+            self._evict()
+
+    def size(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM urls")
+            self._db.execute("DELETE FROM blobs")
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        while total > self.max_bytes:
+            # drop the least recently used url, then any body no longer referenced
+            oldest = self._db.execute("SELECT url FROM urls ORDER BY accessed LIMIT 1").fetchone()
+            if oldest is None:
+                break
+            self._db.execute("DELETE FROM urls WHERE url = ?", oldest)
+            self._db.execute("DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM urls)")
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
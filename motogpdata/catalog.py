@@ -0,0 +1,160 @@
+import copy
+import json
+import threading
+import time
+from ._lazy import lazy_import
+from .cache import ResponseCache, CacheMiss, DEFAULT_TTLS
+from .crawler import RateLimiter
+from .stats import Stats
+from .transport import Transport, shared_transport
+pd = lazy_import('pandas')
+
+BASE_URL = 'https://www.motogp.com/api'
+API_BASE_URL = 'https://api.motogp.com'
+RESOURCES_URL = 'https://resources.motogp.com/files'
+
+
+class Catalog:
+    def __init__(self, cache: ResponseCache = None, rate_limiter: RateLimiter = None, stats: Stats = None,
+                 base_url: str = BASE_URL, api_base_url: str = API_BASE_URL, resources_url: str = RESOURCES_URL,
+                 transport: Transport = None):
+        # catalogs share one pooled transport unless given their own
+        self.transport = transport if transport is not None else shared_transport()
+        self.session = self.transport.session
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.stats = stats if stats is not None else Stats()
+        self.base_url = base_url
+        self.api_base_url = api_base_url
+        self.resources_url = resources_url
+        self._items = {}
+        self._expires = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def throttled(self, rate_limiter: RateLimiter):
+        # a view sharing this catalog's memo, cache, transport and stats, with its own rate limiter
+        view = copy.copy(self)
+        view.rate_limiter = rate_limiter
+        return view
+
+    def get(self, url: str, immutable: bool = True):
+        # immutable=False stores the response with the short 'live' ttl, for data that may still change;
+        # it can also be a function of the downloaded content
+        if self.cache is not None:
+            content = self.cache.get(url)
+            if content is not None:
+                self.stats.record_request(url, nbytes=len(content), cache_hit=True)
+                return content
+            if self.cache.offline:
+                raise CacheMiss(f"'{url}' is not cached (offline mode)")
+        response = self.transport.get(url, stats=self.stats, rate_limiter=self.rate_limiter)
+        # an error left after the retries must not pass for missing data
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.put(url, response.content,
+                           immutable(response.content) if callable(immutable) else immutable)
+        return response.content
+
+    def poll(self, url: str, etag: str = None, last_modified: str = None):
+        # conditional request that bypasses the cache, returns (None, ...) when the payload is unchanged
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        response = self.transport.request(url, headers=headers, stats=self.stats, rate_limiter=self.rate_limiter)
+        if response.status_code == 304:
+            return None, etag, last_modified
+        response.raise_for_status()
+        return (response.content, response.headers.get('ETag', etag),
+                response.headers.get('Last-Modified', last_modified))
+
+    def get_json(self, url: str, immutable: bool = True):
+        return json.loads(self.get(url, immutable))
+
+    def normalize(self, endpoint: str, data):
+        with self.stats.timer(f"dataframe.{endpoint}"):
+            return pd.json_normalize(data)
+
+    def _fresh(self, key):
+        return key in self._items and self._expires.get(key, float('inf')) > time.monotonic()
+
+    def _memo(self, key, loader, endpoint: str = None):
+        # one lock per key, so concurrent callers wait for a single download;
+        # lists that change over time (seasons, events, sessions not official yet) expire after their
+        # endpoint's cache ttl; endpoint can be a function of the loaded value
+        with self._lock:
+            if self._fresh(key):
+                return self._items[key]
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                fresh = self._fresh(key)
+            if not fresh:
+                value = loader()
+                if callable(endpoint):
+                    endpoint = endpoint(value)
+                ttl = (self.cache.ttls if self.cache is not None else DEFAULT_TTLS).get(endpoint)
+                with self._lock:
+                    self._items[key] = value
+                    if ttl is not None:
+                        self._expires[key] = time.monotonic() + ttl
+            return self._items[key]
+
+    def refresh(self, *names):
+        # forgets memoized lists (all of them, or e.g. refresh('events')) so they are loaded again
+        with self._lock:
+            for key in [key for key in self._items if not names or key[0] in names]:
+                del self._items[key]
+                self._expires.pop(key, None)
+
+    def seasons(self):
+        url = f"{self.base_url}/results-front/be/results-api/seasons?test=0"
+        return self._memo(('seasons',), lambda: self.get_json(url), 'seasons')
+
+    def seasons_df(self):
+        return self._memo(('seasons_df',), lambda: self.normalize('seasons', self.seasons()), 'seasons')
+
+    def categories(self, year: int):
+        url = f"{self.api_base_url}/riders-api/season/{year}/categories"
+        return self._memo(('categories', year),
+                          lambda: self.normalize('categories', self.get_json(url))[['id', 'name']].set_index('name'))
+
+    def events(self, season_id: str):
+        url = f"{self.base_url}/results-front/be/results-api/season/{season_id}/events?finished=1"
+        return self._memo(('events', season_id), lambda: self.normalize('events', self.get_json(url)), 'events')
+
+    def riders(self, year: int, category_id: str):
+        url = f"{self.api_base_url}/riders-api/season/{year}/riders?category={category_id}"
+        return self._memo(('riders', year, category_id), lambda: self.normalize('riders', self.get_json(url)))
+
+    def event_categories(self, event_id: str):
+        url = f"{self.base_url}/results-front/be/results-api/event/{event_id}/categories"
+        return self._memo(('event_categories', event_id), lambda: self.normalize('categories', self.get_json(url)))
+
+    def sessions(self, event_id: str, category_id: str):
+        url = f"{self.base_url}/results-front/be/results-api/event/{event_id}/category/{category_id}/sessions"
+
+        def official(content):
+            return all(session.get('status') == 'Official' for session in json.loads(content))
+
+        def load():
+            sessions_df = self.normalize('sessions', self.get_json(url, immutable=official))
+            sessions_df['number'] = sessions_df['number'].fillna(0)
+            return sessions_df
+
+        # the sessions list only stops changing once every session is official
+        return self._memo(('sessions', event_id, category_id), load,
+                          lambda df: 'sessions' if 'status' in df and (df['status'] == 'Official').all() else 'live')
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def shared_catalog(cache: ResponseCache = None):
+    with _catalogs_lock:
+        if cache not in _catalogs:
+            _catalogs[cache] = Catalog(cache)
+        return _catalogs[cache]
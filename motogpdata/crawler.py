@@ -0,0 +1,32 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class RateLimiter:
+    def __init__(self, rate: float):
+        # maximum number of requests per second, per host
+        self.interval = 1 / rate
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def crawl(func, items, max_workers: int = 1, progress: bool = True):
+    from concurrent.futures import ThreadPoolExecutor
+    from tqdm import tqdm
+
+    # results are returned in the order of items, whatever the completion order
+    items = list(items)
+    if max_workers <= 1:
+        return [func(item) for item in tqdm(items, disable=not progress)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(tqdm(pool.map(func, items), total=len(items), disable=not progress))
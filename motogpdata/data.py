@@ -1,65 +1,155 @@
-import pandas as pd
-import numpy as np
-from tqdm import tqdm
+import json
+import os
 from datetime import datetime as dt
-from .handler import _Handler, Season, Event, _tottime2min
+from ._lazy import lazy_import
+from .handler import Season, Event
+from .cache import ResponseCache
+from .catalog import Catalog, shared_catalog
+from .crawler import RateLimiter, crawl
+from .timecodec import times2min
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
 
 this_year = int(dt.today().year)
 
 
-def seasons_list():
-    handler = _Handler()
-    return handler._seasons
-
-
-def event_track_info(category: str = 'MotoGP', start: int = 2005, end: int = this_year):
-    track_temp_list = []
-    seasons_list = []
-    events_list = []
-    circuit_list = []
-    avg_speed_list = []
-    track_cond_list = []
-
-    for s in tqdm(range(start, end)):
-        season = Season(s, category)
-        # print(s)
-        for e in season.events_list:
-            try:
-                event = Event(season, e)
-                # print(e)
-            except ValueError:
-                pass
-            else:
-                avg_track_temp = pd.to_numeric(
-                    event.sessions['condition.ground'].str.replace('º', '')).mean()
-                track_temp_list.append(avg_track_temp)
-                seasons_list.append(s)
-                events_list.append(event.short_name)
-                circuit_list.append(event.circuit)
-                try:
-                    condition = event.sessions.loc[(event.sessions['type'] == 'RAC') & (
-                        event.sessions['status'] == 'Official'), 'condition.track'].item()
-                    track_cond_list.append(condition)
-                except ValueError:
-                    track_cond_list.append(condition)
-                # print(f"{event.short_name}: {condition}")
-
-                try:
-                    rac_res = event.results(session='RAC')
-                    avg_speed = rac_res['average_speed'].mean()
-                    avg_speed_list.append(avg_speed)
-                except KeyError:
-                    avg_speed_list.append(np.nan)
-        # print('- OK')
-
-    track_temp = pd.DataFrame({
-        'season_year': seasons_list,
-        'event': events_list,
-        'circuit': circuit_list,
-        'avg_track_temp': track_temp_list,
-        'avg_speed': avg_speed_list,
-        'track_condition': track_cond_list
-    })
+def seasons_list(cache: ResponseCache = None):
+    return shared_catalog(cache).seasons_df()['year'].to_list()
+
+
+def _catalog(cache: ResponseCache = None, rate_limit: float = None, catalog: Catalog = None):
+    if catalog is None:
+        catalog = shared_catalog(cache)
+    # the limiter only throttles this call, not the shared catalog
+    if rate_limit is not None:
+        catalog = catalog.throttled(RateLimiter(rate_limit))
+    return catalog
+
+
+def _load_season(item):
+    s, category, catalog = item
+    try:
+        season = Season(s, category, catalog=catalog)
+        season.prefetch(riders=False)
+    except ValueError:
+        return None
+    return season
+
+
+def _load_checkpoint(checkpoint):
+    if checkpoint is None or not os.path.exists(checkpoint):
+        return None
+    with open(checkpoint) as file:
+        return json.load(file)
+
+
+def _save_checkpoint(checkpoint, state):
+    tmp_path = checkpoint + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(tmp_path, checkpoint)
+
+
+def _stream(func, catalog, seasons, categories, sessions, checkpoint=None, max_workers=1):
+    # yields func(season, event, session, s_num) batches in crawl order; after each batch is consumed
+    # its (season, category, event, session) is saved so an interrupted crawl can resume after it
+    from tqdm import tqdm
+
+    seasons = list(seasons)
+    done = _load_checkpoint(checkpoint)
+    resume = None
+    if done is not None:
+        # resume by value, the season and event lists may have grown since the checkpoint was saved
+        if done['season'] not in seasons or done['category'] not in categories:
+            raise ValueError(f"Checkpoint '{checkpoint}' ({done['season']} {done['category']}) "
+                             f"is not in the requested seasons and categories")
+        resume = [seasons.index(done['season']), categories.index(done['category'])]
+
+    pairs = [(i_season, i_cat, s, category)
+             for i_season, s in enumerate(seasons) for i_cat, category in enumerate(categories)
+             if resume is None or [i_season, i_cat] >= resume]
+    season_objs = crawl(_load_season, [(s, category, catalog) for _, _, s, category in pairs],
+                        max_workers, progress=False)
+
+    chunk_size = max(max_workers, 1) * 4
+    for (i_season, i_cat, s, category), season in tqdm(list(zip(pairs, season_objs))):
+        if season is None:
+            continue
+        events = season.events_list
+        items = [([i_event, i_session], (season, e, session, s_num))
+                 for i_event, e in enumerate(events)
+                 for i_session, (session, s_num) in enumerate(sessions)]
+        if resume is not None and [i_season, i_cat] == resume:
+            session_key = (done['session'], done['s_num'])
+            if done['event'] not in events or session_key not in sessions:
+                raise ValueError(f"Checkpoint '{checkpoint}' ({done['event']} {done['session']}) "
+                                 f"is not in the {s} {category} events and requested sessions")
+            position = [events.index(done['event']), sessions.index(session_key)]
+            items = [item for item in items if item[0] > position]
+
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            batches = crawl(func, [args for _, args in chunk], max_workers, progress=False)
+            for (_, (_, e, session, s_num)), batch in zip(chunk, batches):
+                if batch is not None:
+                    yield batch
+                if checkpoint is not None:
+                    _save_checkpoint(checkpoint, {'season': s, 'category': category, 'event': e,
+                                                  'session': session, 's_num': s_num})
+
+
+def _sessions(sessions):
+    return [session if isinstance(session, tuple) else (session, 0) for session in sessions]
+
+
+# marks a race condition that could not be read and is carried over from the previous event
+_PREVIOUS = object()
+
+_TRACK_INFO_COLUMNS = ['season_year', 'event', 'circuit', 'avg_track_temp', 'avg_speed', 'track_condition']
+
+
+def _event_track_row(item):
+    season, e, _, _ = item
+    try:
+        event = Event(season, e)
+        event.sessions
+    except ValueError:
+        return None
+    avg_track_temp = pd.to_numeric(
+        event.sessions['condition.ground'].str.replace('º', '')).mean()
+    try:
+        condition = event.sessions.loc[(event.sessions['type'] == 'RAC') & (
+            event.sessions['status'] == 'Official'), 'condition.track'].item()
+    except ValueError:
+        condition = _PREVIOUS
+    try:
+        rac_res = event.results(session='RAC')
+        avg_speed = rac_res['average_speed'].mean()
+    except KeyError:
+        avg_speed = np.nan
+    return pd.DataFrame([[season.selected_season_year, event.short_name, event.circuit,
+                          avg_track_temp, avg_speed, condition]], columns=_TRACK_INFO_COLUMNS)
+
+
+def iter_event_info(category: str = 'MotoGP', start: int = 2005, end: int = this_year,
+                    checkpoint: str = None, cache: ResponseCache = None, max_workers: int = 1,
+                    rate_limit: float = None, catalog: Catalog = None):
+    catalog = _catalog(cache, rate_limit, catalog)
+    condition = None
+    for batch in _stream(_event_track_row, catalog, range(start, end), [category], [('RAC', 0)],
+                         checkpoint, max_workers):
+        if batch['track_condition'].iloc[0] is _PREVIOUS:
+            batch['track_condition'] = [condition]
+        condition = batch['track_condition'].iloc[0]
+        yield batch
+
+
+def event_track_info(category: str = 'MotoGP', start: int = 2005, end: int = this_year,
+                     cache: ResponseCache = None, max_workers: int = 1, rate_limit: float = None,
+                     catalog: Catalog = None):
+    batches = list(iter_event_info(category, start, end, cache=cache, max_workers=max_workers,
+                                   rate_limit=rate_limit, catalog=catalog))
+    track_temp = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=_TRACK_INFO_COLUMNS)
     track_temp['season_year'] = pd.to_datetime(
         track_temp['season_year'], format="%Y")
     track_temp = track_temp.set_index('season_year')
@@ -67,86 +157,91 @@ def event_track_info(category: str = 'MotoGP', start: int = 2005, end: int = thi
     return track_temp
 
 
-def rider_summary(rider_name: str, category: str, seasons_list: list = seasons_list()):
-    date = []
-    event_shortname_ls = []
-    circuit_ls = []
-    time_ls = []
-    avg_speed_ls = []
-    position_ls = []
-    gap_first_ls = []
-    gap_lap_ls = []
-    condition_ls = []
-    total_laps_ls = []
-    rider_name_ls = []
-    points_ls = []
-    
-    for s in tqdm(seasons_list):
-        try:
-            season = Season(s, 'MotoGP')
-        except ValueError:
-            pass
-        else:
-            for e in season.events_list:
-                try:
-                    event = Event(season, e)
-                except ValueError:
-                    pass
-                else:
-                    try:
-                        if event.results()['rider.full_name'].str.contains(rider_name).any():
-                            res = event.results()
-                            date.append(event.sessions.loc[(event.sessions['type'] == 'RAC') & (event.sessions['status'] == 'Official'), 'date'].item())
-                            event_shortname_ls.append(event.short_name)
-                            circuit_ls.append(event.circuit)
-                            time_ls.append(res.loc[res['rider.full_name'] == rider_name, 'time'].item())
-                            avg_speed_ls.append(res.loc[res['rider.full_name'] == rider_name, 'average_speed'].item())
-                            position_ls.append(res.loc[res['rider.full_name'] == rider_name, 'position'].item())
-                            gap_first_ls.append(res.loc[res['rider.full_name'] == rider_name, 'gap.first'].item())
-                            gap_lap_ls.append(res.loc[res['rider.full_name'] == rider_name, 'gap.lap'].item())
-                            
-                            condition = event.sessions.loc[(event.sessions['type'] == 'RAC') & (event.sessions['status'] == 'Official'), 'condition.track'].item()
-                            condition_ls.append(condition)
-                            
-                            total_laps_ls.append(res.loc[res['rider.full_name'] == rider_name, 'total_laps'].item())
-                            points_ls.append(res.loc[res['rider.full_name'] == rider_name, 'points'].item())
-                            rider_name_ls.append(rider_name)
-                    except KeyError:
-                        pass
-            # print(s)
-
-    # dataframe creation
-    df = pd.DataFrame({
-        'rider_name': rider_name_ls,
-        'date': date,
-        'event_short_name': event_shortname_ls,
-        'circuit': circuit_ls,
-        'track_cond': condition_ls,
-        'tot_time': time_ls,
-        'avg_speed': avg_speed_ls,
-        'position': position_ls,
-        'points': points_ls,
-        'gap_first': gap_first_ls,
-        'gap_lap': gap_lap_ls,
-        'tot_laps': total_laps_ls
-    })
-    
-    
-    df['tot_time_m'] = df['tot_time'].apply(_tottime2min)
+def _session_classification(item):
+    season, e, session, s_num = item
+    try:
+        event = Event(season, e)
+        res = event.results(session, s_num)
+        official = ((event.sessions['type'] == session) & (event.sessions['number'] == s_num)
+                    & (event.sessions['status'] == 'Official'))
+        date = event.sessions.loc[official, 'date'].item()
+        condition = event.sessions.loc[official, 'condition.track'].item()
+    except (KeyError, ValueError):
+        return None
+    return res.assign(season=season.selected_season_year, category=season.selected_cat_name,
+                      session=session, session_number=s_num, date=date, circuit=event.circuit,
+                      track_cond=condition)
+
+
+def iter_results(categories: list = ('MotoGP',),
+                 seasons: list = None,
+                 sessions: list = ('RAC',),
+                 checkpoint: str = None,
+                 cache: ResponseCache = None,
+                 max_workers: int = 1,
+                 rate_limit: float = None,
+                 catalog: Catalog = None):
+    catalog = _catalog(cache, rate_limit, catalog)
+    if seasons is None:
+        seasons = catalog.seasons_df()['year'].to_list()
+    yield from _stream(_session_classification, catalog, list(seasons), list(categories), _sessions(sessions),
+                       checkpoint, max_workers)
+
+
+def rider_summary(rider_name: str, category: str, seasons_list: list = None,
+                  cache: ResponseCache = None, max_workers: int = 1, rate_limit: float = None,
+                  catalog: Catalog = None):
+    # seasons default to every season, read from the catalog at call time
+    rows = [res[res['rider.full_name'] == rider_name] for res in iter_results(
+        [category], seasons_list, cache=cache, max_workers=max_workers, rate_limit=rate_limit, catalog=catalog)]
+    return _summary_table(_summary_frame(rows))
+
+
+_SUMMARY_COLUMNS = ['rider_name', 'date', 'event_short_name', 'circuit', 'track_cond', 'tot_time',
+                    'avg_speed', 'position', 'points', 'gap_first', 'gap_lap', 'tot_laps']
+
+
+def _summary_frame(races, columns=_SUMMARY_COLUMNS):
+    if not races:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(races, ignore_index=True).rename(columns={
+        'rider.full_name': 'rider_name', 'event_name': 'event_short_name', 'time': 'tot_time',
+        'average_speed': 'avg_speed', 'gap.first': 'gap_first', 'gap.lap': 'gap_lap', 'total_laps': 'tot_laps'
+    }).reindex(columns=columns)
+
+
+def _summary_table(df):
+    df['tot_time_m'] = times2min(df['tot_time'])
     df['avg_lap_time_m'] = df['tot_time_m'] / df['tot_laps']
     df = df.drop(columns=['tot_time'])
-    
+
     categories = df['position'].sort_values(ascending=False).to_list()
     categories = list(set((int(i) for i in categories if not np.isnan(i))))
     categories = [str(i) for i in categories]
     categories.append('NC')
     categories = list(reversed(categories))
     df['position'] = pd.Categorical(
-        df['position'].astype(str).str.split('.', expand=True)[0],
-        categories=categories, 
+        df['position'].astype(str).str.split('.').str[0],
+        categories=categories,
         ordered=True)
     df['position'] = df['position'].fillna('NC')
     df['date'] = pd.to_datetime(df['date'])
     df['year'] = df['date'].dt.year
 
-    return df
\ No newline at end of file
+    return df
+
+
+def career_table(riders: list = None,
+                 categories: list = ('MotoGP',),
+                 seasons: list = None,
+                 cache: ResponseCache = None,
+                 max_workers: int = 1,
+                 rate_limit: float = None,
+                 catalog: Catalog = None):
+    # every race classification is fetched once and shared by all riders
+    races = [res if riders is None else res[res['rider.full_name'].isin(riders)] for res in iter_results(
+        categories, seasons, cache=cache, max_workers=max_workers, rate_limit=rate_limit, catalog=catalog)]
+    df = _summary_frame(races, _SUMMARY_COLUMNS + ['category'])
+    df = df.sort_values(['rider_name', 'date'], kind='stable').reset_index(drop=True)
+
+    return _summary_table(df)
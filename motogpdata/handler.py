@@ -1,55 +1,81 @@
-import pandas as pd
-import requests
-from PyPDF2 import PdfReader
-import io
+import hashlib
+import json
 import re
-import numpy as np
+import time
 import warnings
-from datetime import datetime as dt
+from functools import cached_property
+from ._lazy import lazy_import
+from .cache import ResponseCache
+from .catalog import Catalog, shared_catalog
+from .analysis import parse_analysis, build_timesheet
+from .timecodec import times2sec, parse_gaps
+from .schema import apply_schema, memory_report
+from .crawler import crawl
+from .laptable import LapTable
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+requests = lazy_import('requests')
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 
-def _tottime2min(time_string):
-    if time_string != '':
-        time = dt.strptime(time_string, "%M:%S.%f")
-        laptime_float = time.minute + time.second / 60
-        return laptime_float
-    else:
-        return None
+def _session_key(session):
+    # 'RAC' -> ('RAC', 0), 'Q2' -> ('Q', 2)
+    session_type, number = re.fullmatch(r"([A-Z]+?)(\d*)", session).groups()
+    return session_type, int(number or 0)
 
-def _min2tottime(total_minutes):
-    minutes = int(total_minutes)
-    seconds = round((total_minutes - minutes) * 60, 3)
-    time_str = f"{minutes:02d}:{seconds:06.3f}"
-    return time_str
 
-def _laptime2sec(time_string):
-    if time_string != '':
-        time = dt.strptime(time_string, "%M'%S.%f")
-        laptime_float = time.minute * 60 + time.second + time.microsecond / 1000000
-        return laptime_float
-    else:
-        return None
+def _watch_rows(classification):
+    # the fields tracked by Event.watch, keyed by rider
+    rows = {}
+    for row in classification:
+        rider = (row.get('rider') or {}).get('full_name')
+        rows[rider] = {'position': row.get('position'),
+                       'gap': (row.get('gap') or {}).get('first'),
+                       'laps': row.get('total_laps'),
+                       'status': row.get('status')}
+    return rows
+
+
+def _watch_deltas(previous, current):
+    deltas = []
+    for rider, fields in current.items():
+        old = previous.get(rider)
+        changed = fields if old is None else {k: v for k, v in fields.items() if old.get(k) != v}
+        if changed:
+            deltas.append({'rider': rider, **changed})
+    deltas.extend({'rider': rider, 'removed': True} for rider in previous if rider not in current)
+    return deltas
 
 
 class _Handler:
-    def __init__(self):
-        self._req = requests.Session()
-        self._base_url = 'https://www.motogp.com/api'
-        self._api_base_url = 'https://api.motogp.com'
+    def __init__(self, cache: ResponseCache = None, catalog: Catalog = None):
+        self._catalog = catalog if catalog is not None else shared_catalog(cache)
+        self._req = self._catalog.session
+        self.stats = self._catalog.stats
+        self._cache = self._catalog.cache
+        self._base_url = self._catalog.base_url
+        self._api_base_url = self._catalog.api_base_url
+        self._resources_url = self._catalog.resources_url
 
         # seasons list
-        seasons_list_url = f"{self._base_url}/results-front/be/results-api/seasons?test=0"
-        self._seasons_list = self._req.get(seasons_list_url, timeout=60).json()
-        self._seasons_df = pd.json_normalize(self._seasons_list)
+        self._seasons_list = self._catalog.seasons()
+        self._seasons_df = self._catalog.seasons_df()
         self._seasons = self._seasons_df['year'].to_list()
 
+    def _get(self, url):
+        return self._catalog.get(url)
+
+    def _get_json(self, url, immutable: bool = True):
+        return self._catalog.get_json(url, immutable)
+
 
 class Season(_Handler):
-    def __init__(self, season: int = 0, category: str = "MotoGP", verbose: bool = False):
+    def __init__(self, season: int = 0, category: str = "MotoGP", verbose: bool = False,
+                 cache: ResponseCache = None, catalog: Catalog = None, compact: bool = False):
 
-        super().__init__()
+        super().__init__(cache, catalog)
         self._verbose = verbose
+        self._compact = compact
 
         # season validation
         if not season:  # chose the last season if variable is empty
@@ -64,9 +90,7 @@ class Season(_Handler):
                 raise ValueError("Invalid season year") from None
 
         # selected season category validation
-        cat_list_url = f"{self._api_base_url}/riders-api/season/{self.selected_season_year}/categories"
-        cat_list = self._req.get(cat_list_url, timeout=60).json()
-        cat_list_df = pd.json_normalize(cat_list)[['id', 'name']].set_index('name')
+        cat_list_df = self._catalog.categories(self.selected_season_year)
         categories = cat_list_df.index.to_list()
         av_cat_message = f"Available categories in season {self.selected_season_year}: {categories}"
 
@@ -77,30 +101,113 @@ class Season(_Handler):
             self.selected_cat_name = category
             self.selected_cat_id = cat_list_df[cat_list_df.index == self.selected_cat_name]['id'].item()
 
-        # list of events
-        fevents_list_url = f"{self._base_url}/results-front/be/results-api/season/{self.selected_season_id}/events?finished=1"
-        fevents_list = self._req.get(fevents_list_url).json()
-        self.events = pd.json_normalize(fevents_list)
-        self.events_list = self.events['short_name'].to_list()
-
         if self._verbose:
             print(f"Loaded {self.selected_cat_name} season {self.selected_season_year} ({self.selected_season_id})")
             print(av_cat_message)
             print(f"Available events:", self.events_list)
+            if self._compact:
+                print(memory_report(events=self.events, riders=self.riders))
 
-        # riders
-        self.riders = self._riders()
+    # events and riders are only downloaded on first access
+    @cached_property
+    def events(self):
+        events = self._catalog.events(self.selected_season_id)
+        if self._compact:
+            events = apply_schema(events, 'events')
+        return events
 
-    def _riders(self):
-        riders_url = f"{self._api_base_url}/riders-api/season/{self.selected_season_year}/riders?category={self.selected_cat_id}"
-        riders = self._req.get(riders_url)
-        riders_df = pd.json_normalize(riders.json())
+    @property
+    def events_list(self):
+        return self.events['short_name'].to_list()
+
+    @cached_property
+    def riders(self):
+        return self._riders()
 
+    def _riders(self):
+        riders_df = self._catalog.riders(self.selected_season_year, self.selected_cat_id)
+        if self._compact:
+            riders_df = apply_schema(riders_df, 'riders')
         return riders_df
 
+    def race_analysis_all(self,
+                          sessions: list = ('RAC',),
+                          categories: list = None,
+                          performance: bool = True,
+                          max_workers: int = 8,
+                          processes: int = None):
+        from concurrent.futures import ProcessPoolExecutor
+
+        timesheets, performances, errors = [], [], []
+        seasons = []
+        for category in ([self.selected_cat_name] if categories is None else categories):
+            if category == self.selected_cat_name:
+                seasons.append(self)
+                continue
+            try:
+                seasons.append(Season(self.selected_season_year, category, catalog=self._catalog,
+                                      compact=self._compact))
+            except ValueError as e:  # a category missing that year must not stop the batch
+                errors.append({'season': self.selected_season_year, 'category': category, 'event': None,
+                               'session': None, 'error': repr(e)})
+        jobs = [(season, short_name, session)
+                for season in seasons for short_name in season.events_list for session in sessions]
+
+        def download(job):
+            season, short_name, session = job
+            try:
+                event = Event(season, short_name)
+                pdf_data = event.analysis_pdf(session)
+                # the classifications _race_analysis reads are downloaded here too, not on the main thread
+                event.prefetch([_session_key(session)] + ([('Q', 2), ('Q', 1)] if performance else []))
+                return event, pdf_data, None
+            except Exception as e:  # one missing event or pdf must not stop the batch
+                return None, None, e
+
+        downloads = crawl(download, jobs, max_workers, progress=False)
+
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(parse_analysis, pdf_data) if error is None else None
+                       for _, pdf_data, error in downloads]
+            for (season, short_name, session), (event, _, error), future in zip(jobs, downloads, futures):
+                keys = {'season': season.selected_season_year, 'category': season.selected_cat_name,
+                        'event': short_name, 'session': session}
+                try:
+                    if error is not None:
+                        raise error
+                    frames = event._race_analysis(future.result(), session, performance)
+                except Exception as e:
+                    errors.append(dict(keys, error=repr(e)))
+                    continue
+                timesheets.append(frames[0].assign(**keys))
+                if performance:
+                    performances.append(frames[-1].assign(**keys))
+
+        timesheets = pd.concat(timesheets, ignore_index=True) if timesheets else pd.DataFrame()
+        performances = pd.concat(performances, ignore_index=True) if performances else pd.DataFrame()
+        errors = pd.DataFrame(errors, columns=['season', 'category', 'event', 'session', 'error'])
+        return timesheets, performances, errors
+
+    def prefetch(self, riders: bool = True, sessions: bool = False, results: list = (), max_workers: int = 1):
+        self.events
+        if riders:
+            self.riders
+        if not sessions and not results:
+            return []
+
+        def load(short_name):
+            try:
+                event = Event(self, short_name)
+                event.prefetch(results)
+            except ValueError:
+                return None
+            return event
+
+        return [event for event in crawl(load, self.events_list, max_workers, progress=False) if event is not None]
+
 
 class Event:
-    def __init__(self, season_obj: object, short_name: str):
+    def __init__(self, season_obj: object, short_name: str, compact: bool = None):
         self.selected_event_id = season_obj.events.loc[season_obj.events['short_name'] == short_name, 'id'].item()
         if season_obj._verbose:
             print(f"Loading event '{short_name}' ({self.selected_event_id}) ... ", end='')
@@ -108,154 +215,141 @@ class Event:
         self.season_obj = season_obj
         self.name = season_obj.events.loc[season_obj.events['short_name'] == short_name, 'name'].item()
         self.short_name = short_name
-
-        # category
-        categories_list_url = f"{season_obj._base_url}/results-front/be/results-api/event/{self.selected_event_id}/categories"
-        categories_list = season_obj._req.get(categories_list_url).json()
-        categories_list_df = pd.json_normalize(categories_list)
-        selected_cat_id = categories_list_df.loc[categories_list_df['name'] == f"{season_obj.selected_cat_name}™", 'id'].item()
-
-        # session
-        sessions_list_url = f"{season_obj._base_url}/results-front/be/results-api/event/{self.selected_event_id}/category/{selected_cat_id}/sessions"
-        sessions_list = season_obj._req.get(sessions_list_url).json()
-        sessions_list_df = pd.json_normalize(sessions_list)
-        sessions_list_df['number'] = sessions_list_df['number'].fillna(0)
-        self.sessions = sessions_list_df
-        self.circuit = self.sessions['circuit'][1]
+        self._compact = season_obj._compact if compact is None else compact
+        self._results = {}
 
         if self.season_obj._verbose:
             print("Done.")
 
+    # sessions and classifications are only downloaded on first access
+    @cached_property
+    def sessions(self):
+        categories_list_df = self.season_obj._catalog.event_categories(self.selected_event_id)
+        selected_cat_id = categories_list_df.loc[categories_list_df['name'] == f"{self.season_obj.selected_cat_name}™", 'id'].item()
+
+        sessions = self.season_obj._catalog.sessions(self.selected_event_id, selected_cat_id)
+        if self._compact:
+            sessions = apply_schema(sessions, 'sessions')
+        return sessions
+
+    @cached_property
+    def circuit(self):
+        return self.sessions['circuit'][1]
+
+    def prefetch(self, results: list = ()):
+        self.sessions
+        for session in results:
+            session, s_num = session if isinstance(session, tuple) else (session, 0)
+            try:
+                self.results(session, s_num)
+            except ValueError:
+                pass
+
     def results(self,
                 session: str = 'RAC',
                 s_num: int = 0,
                 # include_session: bool = False
                 ):
 
-        selected_session_id = self.sessions.loc[(self.sessions['type'] == session) & (self.sessions['number'] == s_num), 'id'].item()
+        if (session, s_num) in self._results:
+            return self._results[(session, s_num)]
+        selected_session = self.sessions.loc[(self.sessions['type'] == session) & (self.sessions['number'] == s_num)]
+        selected_session_id = selected_session['id'].item()
 
-        # classification
+        # classification, cached for good only once the session is official
         classification_list_url = f"{self.season_obj._base_url}/results-front/be/results-api/session/{selected_session_id}/classifications"
-        classification = self.season_obj._req.get(classification_list_url).json()
-        classification_df = pd.json_normalize(classification['classification'])
+        official = 'status' in selected_session and selected_session['status'].item() == 'Official'
+        classification = self.season_obj._get_json(classification_list_url, immutable=official)
+        classification_df = self.season_obj._catalog.normalize('classifications', classification['classification'])
         classification_df['event_id'] = self.selected_event_id
         classification_df['event_name'] = self.short_name
+        if self._compact:
+            classification_df = apply_schema(classification_df, 'classifications')
+        self._results[(session, s_num)] = classification_df
 
         return classification_df
-    
-    def race_analysis(self, save_pdf: bool = False, performance: bool = False):
-        url = f'https://resources.motogp.com/files/results/2022/{self.short_name}/MotoGP/RAC/Analysis.pdf'
-        response = requests.get(url)
-        pdf_data = response.content
+
+    def watch(self, session: str = 'RAC', s_num: int = 0, interval: float = 5.0, max_polls: int = None):
+        # yields a list of delta records each time the live classification changes
+        selected_session_id = self.sessions.loc[(self.sessions['type'] == session) & (self.sessions['number'] == s_num), 'id'].item()
+        url = f"{self.season_obj._base_url}/results-front/be/results-api/session/{selected_session_id}/classifications"
+        catalog = self.season_obj._catalog
+
+        etag = last_modified = digest = None
+        rows = {}
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            if polls:
+                time.sleep(interval)
+            polls += 1
+            content, etag, last_modified = catalog.poll(url, etag, last_modified)
+            if content is None:
+                continue
+            # servers without validators send the full payload every time, skip it when its hash is unchanged
+            new_digest = hashlib.sha1(content).digest()
+            if new_digest == digest:
+                continue
+            digest = new_digest
+            current = _watch_rows(json.loads(content)['classification'])
+            deltas = _watch_deltas(rows, current)
+            rows = current
+            if deltas:
+                yield deltas
+
+    def analysis_pdf(self, session: str = 'RAC'):
+        url = (f"{self.season_obj._resources_url}/results/{self.season_obj.selected_season_year}/{self.short_name}/"
+               f"{self.season_obj.selected_cat_name}/{session}/Analysis.pdf")
+        try:
+            pdf_data = self.season_obj._get(url)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            pdf_data = b''
+        if not pdf_data.startswith(b'%PDF'):
+            raise ValueError(f"No {session} Analysis.pdf for {self.short_name} {self.season_obj.selected_season_year}")
+        return pdf_data
+
+    def race_analysis(self, save_pdf: bool = False, performance: bool = False, session: str = 'RAC'):
+        pdf_data = self.analysis_pdf(session)
         if save_pdf:
             with open(f"{self.short_name}.pdf", "wb") as file:
                 file.write(pdf_data)
-        pdf_reader = PdfReader(io.BytesIO(pdf_data))
-        
-        names = self.season_obj.riders['name'].to_list()
-        surnames = self.season_obj.riders['surname'].str.upper().to_list()
-
-        text = ''
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-            
-        def perc_word(word, perc):
-            len_word = len(word)
-            new_len = round(len_word * perc)
-            return word[:new_len]
-        
-        pattern = r"\d+\.\d+"
-        riders = []
-        laptime_rows = []
-        for line in text.splitlines():
-            for name, surname in zip(names, surnames):
-                if perc_word(name, 0.65) in line and perc_word(surname, 0.75) in line:
-                    rider = name + ' ' + surname
-                    if rider not in riders:
-                        riders.append(rider)
-                        # print(rider)
-            if "'" in line and 'Page' not in line and re.search(pattern, line):
-                line = line.strip(' * *')
-                line = re.sub("[a-zA-Z]", "", line)
-                # print(line)
-                quotes = [match.start() for match in re.finditer("'", line)]
-                if len(quotes) == 2:
-                    split_pos = quotes[1]-1
-                    # print(line[:split_pos])
-                    # print(line[split_pos:])
-                    laptime_rows.append(line[:split_pos])
-                    laptime_rows.append(line[split_pos:])
-                else:
-                    laptime_rows.append(line)
-                    # print(line)
-                    
-        data_rows = []
-        for _, col in self.results().iterrows():
-            for n, row in enumerate(laptime_rows, start=1):
-                row = row.split(' ')
-                # timesheet = timesheet.append(
-                #     {'rider':col['rider.full_name'],
-                #     'lap': row[1],
-                #     'laptime_str': row[0],
-                #     't1': row[2], 
-                #     't2': row[3], 
-                #     't3': row[4],
-                #     't4': row[6],
-                #     'speed': row[5]}, ignore_index=True)
-                data_rows.append({'rider':col['rider.full_name'],
-                     'lap': row[1],
-                     'laptime_str': row[0],
-                     't1': row[2],
-                     't2': row[3],
-                     't3': row[4],
-                     't4': row[6],
-                     'speed': row[5]})
-                if n == col['total_laps']:
-                    laptime_rows = laptime_rows[n:]
-                    break
-                
-        timesheet = pd.DataFrame(data_rows, columns=['rider', 'lap', 'laptime_str', 't1', 't2', 't3', 't4', 'speed'])
-        
-        timesheet['laptime_sec'] = timesheet['laptime_str'].apply(_laptime2sec)
-        timesheet['lap'] = timesheet['lap'].astype(int)
-        timesheet[['t1', 't2', 't3', 't4', 'speed']] = timesheet[['t1', 't2', 't3', 't4', 'speed']].astype(float)
-        self.season_obj.riders['rider'] = self.season_obj.riders['name'] + ' ' + self.season_obj.riders['surname']
+
+        with self.season_obj.stats.timer('pdf.parse'):
+            columns = parse_analysis(pdf_data)
+        return self._race_analysis(columns, session, performance)
+
+    def _race_analysis(self, columns: dict, session: str, performance: bool):
+        stats = self.season_obj.stats
+        race_res = self.results(*_session_key(session))
+        with stats.timer('pdf.timesheet'):
+            timesheet = build_timesheet(columns, race_res['rider.full_name'].to_list(), race_res['total_laps'].to_list())
+
+        timesheet['laptime_sec'] = times2sec(timesheet['laptime_str'])
+        riders_df = self.season_obj.riders.assign(
+            rider=self.season_obj.riders['name'] + ' ' + self.season_obj.riders['surname'])
         timesheet = timesheet.merge(
-            self.season_obj.riders[['rider', 'current_career_step.team.constructor.name', 'current_career_step.team.name']], how='left',
+            riders_df[['rider', 'current_career_step.team.constructor.name', 'current_career_step.team.name']], how='left',
             on='rider')
         timesheet = timesheet.rename(columns={'current_career_step.team.constructor.name': 'constructor',
                                             'current_career_step.team.name': 'team'})
 
-        laptimes_riders = pd.pivot_table(timesheet, values='laptime_sec', index='lap', columns='rider').sort_index()
-        laptimes_riders['avg_laptime'] = laptimes_riders.mean(axis=1)
-        laptimes_riders['lap'] = laptimes_riders.index
-        
-        laptimes_teams = pd.pivot_table(timesheet, values='laptime_sec', index='lap', columns='team').sort_index()
-        laptimes_teams['avg_laptime'] = laptimes_teams.mean(axis=1)
-        laptimes_teams['lap'] = laptimes_teams.index
-        
-        laptimes_constructors = pd.pivot_table(timesheet, values='laptime_sec', index='lap', columns='constructor').sort_index()
-        laptimes_constructors['avg_laptime'] = laptimes_constructors.mean(axis=1)
-        laptimes_constructors['lap'] = laptimes_constructors.index
-        
+        with stats.timer('analysis.laptimes'):
+            lap_table = LapTable.from_timesheet(timesheet, name=self.short_name)
+            laptimes_riders = lap_table.laptimes('rider')
+            laptimes_teams = lap_table.laptimes('team')
+            laptimes_constructors = lap_table.laptimes('constructor')
+
         # performance model
         if performance:
-            race_performance = timesheet.groupby('rider').agg(
-                team=('team', pd.Series.mode),
-                constructor=('constructor', pd.Series.mode),
-                min_laptime=('laptime_sec', 'min'),
-                avg_laptime=('laptime_sec', 'mean'),
-                std_laptime=('laptime_sec', 'std'),
-                max_speed=('speed', 'max'),
-                avg_speed=('speed', 'mean'),
-                std_speed=('speed', 'std'))
-            race_performance = race_performance.merge(self.results()[[
+            race_performance = lap_table.rider_stats()
+            race_performance = race_performance.merge(race_res[[
                 'rider.full_name', 'position', 'points', 'total_laps', 'gap.first'
                 ]], how='left', left_on='rider', right_on='rider.full_name')
             race_performance = race_performance.rename(columns={'rider.full_name': 'rider', 'total_laps':'laps', 'gap.first':'gap_first'})
             race_performance = race_performance.sort_values('position')
-            race_performance['gap_first'] = race_performance['gap_first'].astype(float)
-            race_performance['gap_prev'] = race_performance['gap_first'].diff().apply(lambda x: 0 if x < 0 else x)
+            race_performance['gap_first'] = parse_gaps(race_performance['gap_first'])[0]
+            race_performance['gap_prev'] = race_performance['gap_first'].diff().clip(lower=0)
             race_performance['race_completion'] = (race_performance['laps'] / race_performance['laps'].max()).round(2)
             
             race_performance['delta_avg_laptime'] = (race_performance['avg_laptime'].mean() - race_performance['avg_laptime'])
@@ -272,9 +366,8 @@ class Event:
             q_grid['grid'] = pd.Series(np.arange(1, q_grid.shape[0]+1))
             race_performance = race_performance.merge(q_grid[['rider.full_name', 'grid']], how='left', left_on='rider', right_on='rider.full_name')
             race_performance['pos_delta'] = race_performance['grid'] - race_performance['position']
-            race_performance['pos_delta'] = race_performance.apply(
-                lambda row: row['grid'] - race_performance['position'].notna().sum() if np.isnan(row['pos_delta']) else row['pos_delta'], 
-                axis=1)
+            race_performance['pos_delta'] = race_performance['pos_delta'].fillna(
+                race_performance['grid'] - race_performance['position'].notna().sum())
             
             race_performance['performance_index'] =  race_performance[['pace_consistency_index', 'pace_speed_index']].mean(axis=1)
             # from sklearn.preprocessing import StandardScaler
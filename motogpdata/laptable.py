@@ -0,0 +1,139 @@
+from ._lazy import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+CHANNELS = ['laptime_sec', 't1', 't2', 't3', 't4', 'speed']
+
+
+def _nanmean(values, axis):
+    count = np.sum(~np.isnan(values), axis=axis)
+    total = np.nansum(values, axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _nanstd(values, axis):
+    count = np.sum(~np.isnan(values), axis=axis)
+    mean = np.expand_dims(_nanmean(values, axis), axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 1, np.sqrt(np.nansum((values - mean) ** 2, axis=axis) / (count - 1)), np.nan)
+
+
+class LapTable:
+    def __init__(self, riders, laps, channels: dict, teams, constructors, team_idx, constructor_idx, name=None):
+        # channels hold one riders x laps matrix per measure, NaN where a rider has no lap
+        self.riders = riders
+        self.laps = laps
+        self.channels = channels
+        self.teams = teams
+        self.constructors = constructors
+        self.team_idx = team_idx
+        self.constructor_idx = constructor_idx
+        self.name = name
+
+    @classmethod
+    def from_timesheet(cls, timesheet, name=None):
+        riders, rider_idx = np.unique(timesheet['rider'].to_numpy(dtype=object).astype(str), return_inverse=True)
+        laps, lap_idx = np.unique(timesheet['lap'].to_numpy(), return_inverse=True)
+
+        channels = {}
+        for channel in CHANNELS:
+            values = timesheet[channel].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            total = np.zeros((len(riders), len(laps)))
+            count = np.zeros((len(riders), len(laps)))
+            np.add.at(total, (rider_idx[valid], lap_idx[valid]), values[valid])
+            np.add.at(count, (rider_idx[valid], lap_idx[valid]), 1)
+            with np.errstate(invalid='ignore'):
+                channels[channel] = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+        def groups(column):
+            # first team (or constructor) of each rider, -1 when unknown
+            first = timesheet.groupby(rider_idx)[column].first() if column in timesheet else pd.Series(dtype=object)
+            first = first.reindex(range(len(riders)))
+            names, idx = np.unique(first.dropna().astype(str).to_numpy(), return_inverse=True)
+            group_idx = np.full(len(riders), -1)
+            group_idx[first.notna().to_numpy()] = idx
+            return names, group_idx
+
+        teams, team_idx = groups('team')
+        constructors, constructor_idx = groups('constructor')
+        return cls(riders, laps, channels, teams, constructors, team_idx, constructor_idx, name)
+
+    @property
+    def laptime(self):
+        return self.channels['laptime_sec']
+
+    def cumulative_time(self):
+        # NaN from a rider's first missing lap onwards
+        return np.cumsum(self.laptime, axis=1)
+
+    def gap_to_leader(self):
+        cum = self.cumulative_time()
+        with np.errstate(invalid='ignore'):
+            leader = np.nanmin(np.where(np.isnan(cum), np.inf, cum), axis=0)
+        return cum - np.where(np.isinf(leader), np.nan, leader)
+
+    def positions(self):
+        cum = self.cumulative_time()
+        order = np.argsort(np.where(np.isnan(cum), np.inf, cum), axis=0, kind='stable')
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(1, len(self.riders) + 1)[:, None], axis=0)
+        return np.where(np.isnan(cum), np.nan, positions)
+
+    def rolling_pace(self, window: int = 3):
+        laptime = self.laptime
+        valid = ~np.isnan(laptime)
+        total = np.cumsum(np.where(valid, laptime, 0), axis=1)
+        count = np.cumsum(valid, axis=1)
+        total[:, window:] = total[:, window:] - total[:, :-window]
+        count[:, window:] = count[:, window:] - count[:, :-window]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / count, np.nan)
+
+    def group_mean(self, by: str = 'team', channel: str = 'laptime_sec'):
+        names, group_idx = (self.teams, self.team_idx) if by == 'team' else (self.constructors, self.constructor_idx)
+        values = self.channels[channel]
+        onehot = (group_idx[None, :] == np.arange(len(names))[:, None]).astype(float)
+        valid = ~np.isnan(values)
+        total = onehot @ np.where(valid, values, 0)
+        count = onehot @ valid
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return names, np.where(count > 0, total / count, np.nan)
+
+    def laptimes(self, by: str = 'rider'):
+        # same layout as pd.pivot_table(timesheet, values='laptime_sec', index='lap', columns=by)
+        if by == 'rider':
+            names, values = self.riders, self.laptime
+        else:
+            names, values = self.group_mean(by)
+        keep_cols = ~np.all(np.isnan(values), axis=1)
+        keep_rows = ~np.all(np.isnan(values), axis=0)
+        df = pd.DataFrame(values[keep_cols][:, keep_rows].T,
+                          index=pd.Index(self.laps[keep_rows], name='lap'),
+                          columns=pd.Index(names[keep_cols], name=by))
+        df['avg_laptime'] = _nanmean(values[keep_cols][:, keep_rows], axis=0)
+        df['lap'] = df.index
+        return df
+
+    def rider_stats(self):
+        laptime, speed = self.laptime, self.channels['speed']
+        with np.errstate(invalid='ignore'):
+            stats = pd.DataFrame({
+                'team': np.where(self.team_idx >= 0, self.teams[self.team_idx] if len(self.teams) else None, None),
+                'constructor': np.where(self.constructor_idx >= 0,
+                                        self.constructors[self.constructor_idx] if len(self.constructors) else None,
+                                        None),
+                'min_laptime': np.fmin.reduce(laptime, axis=1),
+                'avg_laptime': _nanmean(laptime, axis=1),
+                'std_laptime': _nanstd(laptime, axis=1),
+                'max_speed': np.fmax.reduce(speed, axis=1),
+                'avg_speed': _nanmean(speed, axis=1),
+                'std_speed': _nanstd(speed, axis=1),
+            }, index=pd.Index(self.riders, name='rider'))
+        return stats
+
+
+def compare(tables: list, stat: str = 'avg_laptime'):
+    # one column per race, one row per rider
+    return pd.concat({table.name: table.rider_stats()[stat] for table in tables}, axis=1)
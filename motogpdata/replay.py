@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from .catalog import Catalog, BASE_URL, API_BASE_URL, RESOURCES_URL
+
+
+def _key(url):
+    # fixtures are keyed by host, path and query: www.motogp.com/api/results-front/...?test=0
+    parts = urlsplit(url)
+    return parts.netloc + parts.path + (f"?{parts.query}" if parts.query else '')
+
+
+class Recorder:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._index_path = os.path.join(directory, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as file:
+                self.index = json.load(file)
+        else:
+            self.index = {}
+
+    def save(self, url: str, content: bytes, append: bool = False):
+        # append=True records successive payloads of a live url, replayed one per request
+        key = _key(url)
+        with self._lock:
+            names = self.index.get(key) if append else None
+            names = names if isinstance(names, list) else []
+            name = (hashlib.sha1(key.encode()).hexdigest() + (f"-{len(names)}" if append else '')
+                    + ('.pdf' if key.endswith('.pdf') else '.json'))
+            with open(os.path.join(self.directory, name), 'wb') as file:
+                file.write(content)
+            self.index[key] = names + [name] if append else name
+            with open(self._index_path, 'w') as file:
+                json.dump(self.index, file, indent=1)
+
+    def attach(self, catalog: Catalog):
+        # every response downloaded through the catalog is written to the fixtures directory
+        get = catalog.get
+
+        def recording_get(url, immutable: bool = True):
+            content = get(url, immutable)
+            self.save(url, content)
+            return content
+
+        catalog.get = recording_get
+        return catalog
+
+
+class ReplayServer:
+    def __init__(self, directory: str, latency: float = 0.0, jitter: float = 0.0, port: int = 0):
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._served = {}
+        self._lock = threading.Lock()
+        with open(os.path.join(directory, 'index.json')) as file:
+            self.index = json.load(file)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                key = self.path.lstrip('/')
+                name = server.index.get(key)
+                with server._lock:
+                    server.requests += 1
+                    if isinstance(name, list):
+                        # a live url moves on to its next payload at every request, then stays on the last one
+                        served = server._served.get(key, 0)
+                        server._served[key] = served + 1
+                        name = name[min(served, len(name) - 1)]
+                time.sleep(server.latency + random.uniform(0, server.jitter))
+                if name is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{name}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                with open(os.path.join(server.directory, name), 'rb') as file:
+                    content = file.read()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/pdf' if name.endswith('.pdf') else 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def catalog(self, **kwargs):
+        # a catalog whose base urls point at the replayed hosts
+        return Catalog(base_url=self.url + '/' + _key(BASE_URL),
+                       api_base_url=self.url + '/' + _key(API_BASE_URL),
+                       resources_url=self.url + '/' + _key(RESOURCES_URL),
+                       **kwargs)
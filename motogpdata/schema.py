@@ -0,0 +1,95 @@
+from ._lazy import lazy_import
+pd = lazy_import('pandas')
+
+# columns kept for each endpoint and the compact type they are stored with:
+#   'category' for repeated strings, 'int' / 'float' for numbers (downcast to the smallest type),
+#   'str' for columns left as they are
+SCHEMAS = {
+    'riders': {
+        'id': 'str',
+        'name': 'str',
+        'surname': 'str',
+        'birth_date': 'str',
+        'country.iso': 'category',
+        'country.name': 'category',
+        'current_career_step.number': 'int',
+        'current_career_step.sponsored_team': 'category',
+        'current_career_step.team.name': 'category',
+        'current_career_step.team.constructor.name': 'category',
+        'current_career_step.category.name': 'category',
+        'current_career_step.type': 'category',
+    },
+    'events': {
+        'id': 'str',
+        'name': 'str',
+        'sponsored_name': 'str',
+        'short_name': 'category',
+        'date_start': 'str',
+        'date_end': 'str',
+        'circuit.name': 'category',
+        'country.iso': 'category',
+        'country.name': 'category',
+    },
+    'sessions': {
+        'id': 'str',
+        'type': 'category',
+        'number': 'int',
+        'date': 'str',
+        'status': 'category',
+        'circuit': 'category',
+        'condition.track': 'category',
+        'condition.weather': 'category',
+        'condition.air': 'category',
+        'condition.humidity': 'category',
+        'condition.ground': 'category',
+    },
+    'classifications': {
+        'position': 'int',
+        'rider.full_name': 'category',
+        'rider.number': 'int',
+        'rider.country.iso': 'category',
+        'team.name': 'category',
+        'constructor.name': 'category',
+        'time': 'str',
+        'average_speed': 'float',
+        'top_speed': 'float',
+        'total_laps': 'int',
+        'points': 'float',
+        'gap.first': 'float',
+        'gap.lap': 'float',
+        'best_lap.number': 'int',
+        'best_lap.time': 'str',
+        'status': 'category',
+        'event_id': 'category',
+        'event_name': 'category',
+    },
+}
+
+
+def _downcast(s, kind):
+    if kind == 'category':
+        return s.astype('category')
+    if kind in ('int', 'float'):
+        s = pd.to_numeric(s, errors='coerce')
+        # integers with missing values cannot be stored as numpy integers
+        if kind == 'int' and s.notna().all():
+            return pd.to_numeric(s, downcast='integer')
+        return s.astype('float32')
+    return s
+
+
+def apply_schema(df, endpoint: str):
+    schema = SCHEMAS[endpoint]
+    before = df.memory_usage(deep=True).sum()
+    df = pd.DataFrame({col: _downcast(df[col], kind) for col, kind in schema.items() if col in df.columns},
+                      index=df.index)
+    df.attrs['memory'] = {'before': before, 'after': df.memory_usage(deep=True).sum()}
+    return df
+
+
+def memory_report(**frames):
+    report = pd.DataFrame({name: df.attrs.get('memory', {
+        'before': df.memory_usage(deep=True).sum(), 'after': df.memory_usage(deep=True).sum()})
+        for name, df in frames.items()}).T
+    report['ratio'] = (report['before'] / report['after']).round(2)
+    return report
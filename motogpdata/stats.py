@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from ._lazy import lazy_import
+from .cache import _endpoint
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.latency = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+        self.status = Counter()
+
+
+class Stats:
+    def __init__(self):
+        self.callbacks = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = defaultdict(_EndpointStats)
+            self._stages = defaultdict(list)
+
+    def add_callback(self, func):
+        # func receives one dict per recorded request or timed stage
+        self.callbacks.append(func)
+
+    def _notify(self, record):
+        for func in self.callbacks:
+            func(record)
+
+    def record_request(self, url: str, status: int = None, nbytes: int = 0, elapsed: float = 0.0,
+                       cache_hit: bool = False, retries: int = 0, error: bool = False):
+        endpoint = _endpoint(url)
+        with self._lock:
+            stats = self._endpoints[endpoint]
+            stats.requests += 1
+            stats.bytes += nbytes
+            stats.retries += retries
+            stats.errors += error
+            if cache_hit:
+                stats.cache_hits += 1
+            else:
+                stats.latency += elapsed
+                stats.histogram[int(np.searchsorted(LATENCY_BUCKETS, elapsed))] += 1
+                stats.status[status] += 1
+        self._notify({'kind': 'request', 'endpoint': endpoint, 'url': url, 'status': status, 'bytes': nbytes,
+                      'elapsed': elapsed, 'cache_hit': cache_hit, 'retries': retries, 'error': error})
+
+    @contextmanager
+    def timer(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self._stages[stage].append(elapsed)
+            self._notify({'kind': 'stage', 'stage': stage, 'elapsed': elapsed})
+
+    def requests(self):
+        with self._lock:
+            rows = {endpoint: {
+                'requests': s.requests,
+                'cache_hits': s.cache_hits,
+                'bytes': s.bytes,
+                'retries': s.retries,
+                'errors': s.errors,
+                'total_latency': s.latency,
+                'avg_latency': s.latency / max(s.requests - s.cache_hits, 1),
+                'status': dict(s.status),
+                **{f"le_{bound:g}s": count for bound, count in zip(LATENCY_BUCKETS, s.histogram)},
+            } for endpoint, s in self._endpoints.items()}
+        report = pd.DataFrame.from_dict(rows, orient='index')
+        return report.sort_values('total_latency', ascending=False) if rows else report
+
+    def stages(self):
+        with self._lock:
+            rows = {stage: {
+                'calls': len(times),
+                'total': sum(times),
+                'mean': sum(times) / len(times),
+                'max': max(times),
+            } for stage, times in self._stages.items()}
+        report = pd.DataFrame.from_dict(rows, orient='index')
+        return report.sort_values('total', ascending=False) if rows else report
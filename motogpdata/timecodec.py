@@ -0,0 +1,53 @@
+import re
+from ._lazy import lazy_import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# [H:]M:SS.fff (race times), M'SS.fff (analysis laptimes), SS.fff and +S.fff (gaps)
+_TIME = re.compile(r"^\+?(?:(?:(?P<h>\d+):)?(?P<m>\d+)[:'])?(?P<s>\d+(?:\.\d*)?)$")
+# +1 Lap, +3 Laps
+_LAPS = re.compile(r"^\+?(?P<laps>\d+)\s*Laps?$", re.IGNORECASE)
+
+
+def _text(values):
+    s = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values.astype(object)
+    return s.where(s.notna(), '').astype(str).str.strip()
+
+
+def parse_times(values):
+    parts = _text(values).str.extract(_TIME)
+    seconds = parts['s'].astype(float).to_numpy()
+    null = np.isnan(seconds)
+    seconds = (seconds
+               + parts['m'].astype(float).fillna(0).to_numpy() * 60
+               + parts['h'].astype(float).fillna(0).to_numpy() * 3600)
+    return seconds, null
+
+
+def parse_gaps(values):
+    text = _text(values)
+    seconds, null = parse_times(text)
+    laps = text.str.extract(_LAPS)['laps'].astype(float).fillna(0).to_numpy()
+    # a rider lapped by the winner has a gap in laps, not in seconds
+    null &= laps == 0
+    return seconds, laps, null
+
+
+def format_times(seconds, sep: str = ':'):
+    seconds = np.asarray(seconds, dtype=float)
+    null = np.isnan(seconds)
+    millis = np.rint(np.where(null, 0, seconds) * 1000).astype(np.int64)
+    minutes = pd.Series(millis // 60000).astype(str).str.zfill(2)
+    secs = pd.Series(millis % 60000 // 1000).astype(str).str.zfill(2)
+    frac = pd.Series(millis % 1000).astype(str).str.zfill(3)
+    formatted = (minutes + sep + secs + '.' + frac).to_numpy(dtype=object)
+    formatted[null] = None
+    return formatted
+
+
+def times2sec(values):
+    return parse_times(values)[0]
+
+
+def times2min(values):
+    return times2sec(values) / 60
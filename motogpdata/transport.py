@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+from ._lazy import lazy_import
+requests = lazy_import('requests')
+
+# statuses worth retrying: rate limited or a transient server error
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class Transport:
+    def __init__(self, pool_size: int = 32, timeout: tuple = (10, 60), retries: int = 4,
+                 backoff: float = 0.5, max_backoff: float = 30.0):
+        # timeout is (connect, read) in seconds, backoff the base delay doubled at every retry
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        # enough keep-alive connections per host for the crawler's thread pools
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _delay(self, attempt: int, response=None):
+        # Retry-After (seconds or http date) when the server sends one, otherwise exponential backoff with full jitter
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            from email.utils import parsedate_to_datetime
+            try:
+                return min(max(float(retry_after), 0), self.max_backoff)
+            except ValueError:
+                pass
+            try:
+                return min(max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0), self.max_backoff)
+            except (TypeError, ValueError):
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, url: str, headers: dict = None, stats=None, rate_limiter=None):
+        attempt = 0
+        t0 = time.perf_counter()
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.wait(url)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt < self.retries:
+                    time.sleep(self._delay(attempt))
+                    attempt += 1
+                    continue
+                if stats is not None:
+                    stats.record_request(url, elapsed=time.perf_counter() - t0, retries=attempt, error=True)
+                raise
+            except requests.RequestException:
+                if stats is not None:
+                    stats.record_request(url, elapsed=time.perf_counter() - t0, retries=attempt, error=True)
+                raise
+            if response.status_code in RETRY_STATUS and attempt < self.retries:
+                time.sleep(self._delay(attempt, response))
+                attempt += 1
+                continue
+            if stats is not None:
+                stats.record_request(url, status=response.status_code, nbytes=len(response.content),
+                                     elapsed=time.perf_counter() - t0, retries=attempt,
+                                     error=not response.ok and response.status_code != 304)
+            return response
+
+    def get(self, url: str, stats=None, rate_limiter=None):
+        # concurrent callers asking for the same url share one request
+        with self._lock:
+            call = self._inflight.get(url)
+            owner = call is None
+            if owner:
+                call = self._inflight[url] = _Call()
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response
+        try:
+            call.response = self.request(url, stats=stats, rate_limiter=rate_limiter)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[url]
+            call.done.set()
+        return call.response
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def shared_transport():
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
@@ -0,0 +1,204 @@
+import glob
+import json
+import os
+from ._lazy import lazy_import
+from .cache import ResponseCache
+from .catalog import Catalog, shared_catalog
+from .crawler import crawl
+from .handler import Season, Event
+pd = lazy_import('pandas')
+requests = lazy_import('requests')
+
+# partition keys of each table, in directory order
+TABLES = {
+    'riders': ['season', 'category'],
+    'sessions': ['season', 'category'],
+    'classifications': ['season', 'category', 'session_type'],
+    'timesheets': ['season', 'category', 'session_type'],
+}
+
+
+def _to_parquet_safe(df):
+    # nested json values and mixed-type object columns cannot be stored as parquet columns
+    df = df.copy()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].map(
+            lambda v: json.dumps(v) if isinstance(v, (list, dict))
+            else v if v is None or isinstance(v, str) or pd.isna(v) else str(v))
+    return df
+
+
+class Warehouse:
+    def __init__(self, root: str, cache: ResponseCache = None, catalog: Catalog = None):
+        self.root = root
+        self.catalog = catalog if catalog is not None else shared_catalog(cache)
+        self._manifest_path = os.path.join(root, 'manifest.json')
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path) as file:
+                self.manifest = json.load(file)
+        else:
+            self.manifest = {'events': {}, 'riders': []}
+
+    def _save_manifest(self):
+        tmp_path = self._manifest_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.manifest, file, indent=1)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _write(self, table, df, name, **partition):
+        path = os.path.join(self.root, table, *(f"{key}={partition[key]}" for key in TABLES[table]))
+        os.makedirs(path, exist_ok=True)
+        _to_parquet_safe(df).to_parquet(os.path.join(path, f"{name}.parquet"), index=False)
+
+    def _sync_event(self, item):
+        season, index, short_name, session_types, timesheets, entry = item
+        try:
+            event = Event(season, short_name)
+            event.sessions
+        except ValueError:
+            return None
+        year, category = season.selected_season_year, season.selected_cat_name
+        # what a previous run already stored is not downloaded again
+        entry = dict(entry or {}, season=year, category=category, short_name=event.short_name)
+        stored = set(entry.get('sessions', []))
+        unavailable = set(entry.get('unavailable', []))
+
+        sessions = event.sessions.assign(event_id=event.selected_event_id, event_name=event.short_name,
+                                         event_index=index)
+        self._write('sessions', sessions, event.selected_event_id, season=year, category=category)
+        entry['session_types'] = dict(zip(event.sessions['id'], event.sessions['type']))
+
+        for _, session in event.sessions.iterrows():
+            if (session['id'] in stored or session['id'] in unavailable
+                    or (session_types is not None and session['type'] not in session_types)):
+                continue
+            try:
+                res = event.results(session['type'], session['number'])
+            except (KeyError, ValueError):
+                # the session has no classification, it is not asked for again
+                unavailable.add(session['id'])
+                continue
+            except requests.RequestException:
+                # a failed download is retried by the next sync
+                continue
+            res = res.assign(session_id=session['id'], session_number=session['number'])
+            self._write('classifications', res, session['id'], season=year, category=category,
+                        session_type=session['type'])
+            stored.add(session['id'])
+        entry['sessions'] = sorted(stored)
+        entry['unavailable'] = sorted(unavailable)
+
+        if timesheets and not entry.get('timesheets'):
+            try:
+                timesheet = event.race_analysis()[0]
+            except Exception:  # a missing or malformed pdf must not stop the sync, it is retried next time
+                pass
+            else:
+                timesheet = timesheet.assign(event_id=event.selected_event_id, event_name=event.short_name)
+                self._write('timesheets', timesheet, event.selected_event_id, season=year, category=category,
+                            session_type='RAC')
+                entry['timesheets'] = True
+
+        return f"{category}/{event.selected_event_id}", entry
+
+    @staticmethod
+    def _complete(entry, session_types, timesheets):
+        # an event is skipped only when every requested session that has a classification (and its timesheet) is stored
+        if entry is None or 'session_types' not in entry:
+            return False
+        wanted = {session_id for session_id, session_type in entry['session_types'].items()
+                  if session_types is None or session_type in session_types} - set(entry.get('unavailable', []))
+        return wanted <= set(entry['sessions']) and (not timesheets or entry.get('timesheets', False))
+
+    def sync(self,
+             seasons: list = None,
+             categories: list = ('MotoGP',),
+             session_types: list = None,
+             timesheets: bool = False,
+             max_workers: int = 1):
+        # newly finished events only show up in a freshly downloaded events list
+        self.catalog.refresh('seasons', 'seasons_df', 'events')
+        if seasons is None:
+            seasons = self.catalog.seasons_df()['year'].to_list()
+
+        added = []
+        for year in seasons:
+            for category in categories:
+                try:
+                    season = Season(year, category, catalog=self.catalog)
+                except ValueError:
+                    continue
+                # only events with sessions or timesheets not stored by a previous run are downloaded
+                items = [(season, index, short_name, session_types, timesheets,
+                          self.manifest['events'].get(f"{category}/{event_id}"))
+                         for index, (event_id, short_name) in enumerate(zip(season.events['id'], season.events_list))
+                         if not self._complete(self.manifest['events'].get(f"{category}/{event_id}"),
+                                               session_types, timesheets)]
+                if not items and [year, category] in self.manifest['riders']:
+                    continue
+
+                for entry in crawl(self._sync_event, items, max_workers):
+                    if entry is not None:
+                        if entry[1] != self.manifest['events'].get(entry[0]):
+                            added.append(entry[0])
+                        self.manifest['events'][entry[0]] = entry[1]
+                self._write('riders', season.riders, 'riders', season=year, category=category)
+                if [year, category] not in self.manifest['riders']:
+                    self.manifest['riders'].append([year, category])
+                self._save_manifest()
+
+        return added
+
+    def read(self,
+             table: str,
+             seasons: list = None,
+             categories: list = None,
+             session_types: list = None,
+             columns: list = None):
+        # partition pruning: only the directories matching the filters are read
+        filters = {'season': seasons, 'category': categories, 'session_type': session_types}
+        pattern = os.path.join(self.root, table, *(
+            f"{key}=*" for key in TABLES[table]), '*.parquet')
+
+        frames = []
+        for path in sorted(glob.glob(pattern)):
+            parts = dict(part.split('=', 1) for part in os.path.relpath(os.path.dirname(path), os.path.join(
+                self.root, table)).split(os.sep))
+            if any(filters[key] is not None and parts[key] not in {str(v) for v in filters[key]} for key in parts):
+                continue
+            df = pd.read_parquet(path, columns=columns)
+            for key, value in parts.items():
+                df[key] = int(value) if key == 'season' else value
+            frames.append(df)
+
+        if not frames:
+            return pd.DataFrame(columns=(columns or []) + TABLES[table])
+        return pd.concat(frames, ignore_index=True)
+
+    def event_track_info(self, category: str = 'MotoGP', start: int = 2005, end: int = None):
+        seasons = None if end is None else range(start, end)
+        sessions = self.read('sessions', seasons=seasons, categories=[category])
+        sessions = sessions[sessions['season'] >= start].sort_values(['season', 'event_index'], kind='stable')
+        sessions['ground_temp'] = pd.to_numeric(sessions['condition.ground'].str.replace('º', ''))
+
+        keys = ['season', 'event_index', 'event_id']
+        events = sessions.groupby(keys, sort=True)
+        track_info = pd.DataFrame({
+            'event': events['event_name'].first(),
+            'circuit': events['circuit'].agg(lambda circuit: circuit.iloc[1] if len(circuit) > 1 else None),
+            'avg_track_temp': events['ground_temp'].mean(),
+        })
+        official_rac = sessions[(sessions['type'] == 'RAC') & (sessions['status'] == 'Official')]
+        track_info['track_condition'] = official_rac.groupby(keys)['condition.track'].first()
+
+        rac = self.read('classifications', seasons=seasons, categories=[category], session_types=['RAC'],
+                        columns=['event_id', 'session_number', 'average_speed'])
+        rac = rac[rac['session_number'] == 0]
+        avg_speed = rac.groupby('event_id')['average_speed'].mean()
+        track_info['avg_speed'] = track_info.index.get_level_values('event_id').map(avg_speed)
+
+        track_info = track_info.reset_index()
+        track_info['season_year'] = pd.to_datetime(track_info['season'], format="%Y")
+        return track_info.set_index('season_year')[
+            ['event', 'circuit', 'avg_track_temp', 'avg_speed', 'track_condition']]
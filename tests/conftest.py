@@ -0,0 +1,95 @@
+import json
+import pytest
+from motogpdata.replay import Recorder, ReplayServer
+
+RESULTS_API = 'https://www.motogp.com/api/results-front/be/results-api'
+RIDERS_API = 'https://api.motogp.com/riders-api'
+
+RIDERS = [('Francesco', 'Bagnaia', 'Ducati Lenovo', 'Ducati'),
+          ('Fabio', 'Quartararo', 'Monster Yamaha', 'Yamaha'),
+          ('Jack', 'Miller', 'Ducati Lenovo', 'Ducati')]
+SEASONS = {2023: 's23', 2022: 's22'}
+EVENTS = ['QAT', 'ITA']
+SESSIONS = [('FP', 1), ('Q', 1), ('Q', 2), ('RAC', None)]
+
+
+def classification_url(session_id):
+    return f"{RESULTS_API}/session/{session_id}/classifications"
+
+
+def classification(riders, laps=22, status='INSTND'):
+    return {'classification': [
+        {'position': position + 1, 'rider': {'full_name': rider}, 'total_laps': laps, 'status': status,
+         'time': f"41:1{position}.000", 'average_speed': 160.5 - position, 'points': 25 - 5 * position,
+         'gap': {'first': f"{position * 1.5:.3f}", 'lap': '0.000'}}
+        for position, rider in enumerate(riders)]}
+
+
+def analysis_url(year, short_name, session='RAC'):
+    return f"https://resources.motogp.com/files/results/{year}/{short_name}/MotoGP/{session}/Analysis.pdf"
+
+
+def analysis_pdf(lines):
+    # a minimal one page pdf with one text line per row
+    def escape(line):
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    text = ''.join(f"BT /F1 9 Tf 40 {800 - 12 * i} Td ({escape(line)}) Tj ET\n" for i, line in enumerate(lines))
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>',
+               '<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+               '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 4 0 R >> >> '
+               '/Contents 5 0 R >>',
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+               f"<< /Length {len(text)} >>\nstream\n{text}endstream"]
+    pdf = '%PDF-1.4\n'
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{obj}\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    pdf += ''.join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return pdf.encode('latin-1')
+
+
+def record(directory):
+    # a small synthetic championship: two seasons, two events each, four sessions per event
+    recorder = Recorder(str(directory))
+
+    def save(url, data):
+        recorder.save(url, json.dumps(data).encode())
+
+    names = [f"{name} {surname}" for name, surname, _, _ in RIDERS]
+    save(f"{RESULTS_API}/seasons?test=0", [{'id': season_id, 'year': year} for year, season_id in SEASONS.items()])
+    for year, season_id in SEASONS.items():
+        save(f"{RIDERS_API}/season/{year}/categories", [{'id': 'cat-motogp', 'name': 'MotoGP'}])
+        save(f"{RIDERS_API}/season/{year}/riders?category=cat-motogp", [
+            {'id': f"r{i}", 'name': name, 'surname': surname,
+             'current_career_step': {'team': {'name': team, 'constructor': {'name': constructor}}}}
+            for i, (name, surname, team, constructor) in enumerate(RIDERS)])
+        events = [{'id': f"{season_id}-e{i}", 'name': f"GP {short_name}", 'short_name': short_name}
+                  for i, short_name in enumerate(EVENTS)]
+        save(f"{RESULTS_API}/season/{season_id}/events?finished=1", events)
+        for i, event in enumerate(events):
+            save(f"{RESULTS_API}/event/{event['id']}/categories", [{'id': f"{event['id']}-c", 'name': 'MotoGP™'}])
+            sessions = [{'id': f"{event['id']}-{session_type}{number or ''}", 'type': session_type,
+                         'number': number, 'status': 'Official', 'date': f"{year}-0{i + 3}-1{i}T12:00:00",
+                         'circuit': f"Circuit {event['short_name']}",
+                         'condition': {'track': 'Dry', 'ground': f"{30 + i}º"}}
+                        for session_type, number in SESSIONS]
+            save(f"{RESULTS_API}/event/{event['id']}/category/{event['id']}-c/sessions", sessions)
+            for session in sessions:
+                save(classification_url(session['id']), classification(names[i:] + names[:i]))
+    return recorder
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    return record(tmp_path / 'fixtures')
+
+
+@pytest.fixture
+def server(fixtures):
+    with ReplayServer(fixtures.directory) as server:
+        yield server
@@ -0,0 +1,96 @@
+import json
+import numpy as np
+import pytest
+from motogpdata.analysis import AnalysisParser, build_timesheet, parse_analysis
+from motogpdata.handler import Season
+from motogpdata.replay import ReplayServer
+from conftest import RIDERS, analysis_pdf, analysis_url, classification, classification_url
+
+NAMES = [f"{name} {surname}" for name, surname, _, _ in RIDERS]
+
+
+def lap(laptime, number, speed=300.0):
+    return f"{laptime} {number} 30.1 40.2 20.3 {speed} 25.4"
+
+
+class StubParser(AnalysisParser):
+    def __init__(self, lines):
+        self._lines = lines
+
+    def lines(self, pdf_data):
+        return iter(self._lines)
+
+
+def test_parse_lines():
+    columns = StubParser([
+        '1 Francesco BAGNAIA Ducati Lenovo Team',
+        lap("1'50.100", 1),
+        # two laps printed side by side
+        lap("1'50.200", 2) + ' ' + lap("1'51.300", 3),
+        # pit and unfinished lap markers are stripped
+        lap("1'59.900", 4) + ' P',
+        "Runs=1 Total laps=4 Full laps=4",
+        "Page 1 of 2 1'50.100",
+        # a short row leaves its missing fields empty
+        "2'10.000 5 30.1",
+    ]).parse(b'')
+    assert list(columns['laptime_str']) == ["1'50.100", "1'50.200", "1'51.300", "1'59.900", "2'10.000"]
+    assert list(columns['lap']) == ['1', '2', '3', '4', '5']
+    assert list(columns['speed']) == ['300.0'] * 4 + [None]
+    assert list(columns['t4']) == ['25.4'] * 4 + [None]
+
+
+def _columns(n_rows):
+    return StubParser([lap(f"1'5{i}.000", i + 1) for i in range(n_rows)]).parse(b'')
+
+
+def test_build_timesheet():
+    timesheet = build_timesheet(_columns(5), ['A', 'B'], [3, 2])
+    assert list(timesheet['rider']) == ['A'] * 3 + ['B'] * 2
+    assert list(timesheet['lap']) == [1, 2, 3, 4, 5]
+    assert timesheet['t1'].dtype == float
+
+
+def test_build_timesheet_fallbacks():
+    # a rider without laps, or with more laps than rows left, takes the rows left
+    timesheet = build_timesheet(_columns(4), ['A', 'B', 'C'], [2, np.nan, 1])
+    assert list(timesheet['rider']) == ['A', 'A', 'B', 'B', 'C']
+    assert list(timesheet['lap']) == [1, 2, 3, 4, 3]
+    timesheet = build_timesheet(_columns(4), ['A', 'B'], [2, 5])
+    assert list(timesheet['rider']) == ['A', 'A', 'B', 'B']
+
+
+def test_parse_analysis_pdf():
+    pdf = analysis_pdf(['1 Francesco BAGNAIA', lap("1'50.100", 1) + ' ' + lap("1'50.200", 2), 'Page 1 of 1'])
+    columns = parse_analysis(pdf)
+    assert list(columns['laptime_str']) == ["1'50.100", "1'50.200"]
+
+
+@pytest.fixture
+def race_server(fixtures):
+    # QAT has a two lap race, ITA a malformed pdf, and neither has a Q2 analysis
+    fixtures.save(classification_url('s22-e0-RAC'), json.dumps(classification(NAMES, laps=2)).encode())
+    lines = []
+    for position, name in enumerate(NAMES):
+        lines.append(f"{position + 1} {name.split()[0]} {name.split()[1].upper()}")
+        lines.extend(lap(f"1'5{position}.{number}00", number, 300 + position) for number in (1, 2))
+    fixtures.save(analysis_url(2022, 'QAT'), analysis_pdf(lines))
+    fixtures.save(analysis_url(2022, 'ITA'), b'%PDF-1.4 truncated')
+    with ReplayServer(fixtures.directory) as server:
+        yield server
+
+
+def test_race_analysis_all(race_server):
+    season = Season(2022, catalog=race_server.catalog())
+    timesheets, performances, errors = season.race_analysis_all(sessions=['RAC', 'Q2'],
+                                                                categories=['MotoGP', 'Moto3'], processes=2)
+
+    assert timesheets.groupby('rider')['lap'].apply(list).to_dict() == {name: [1, 2] for name in NAMES}
+    assert set(timesheets['event']) == {'QAT'}
+    np.testing.assert_allclose(timesheets.loc[timesheets['rider'] == NAMES[1], 'laptime_sec'], [111.1, 111.2])
+    assert list(performances.sort_values('position')['rider']) == NAMES
+
+    failed = set(errors[['category', 'event', 'session']].fillna('-').itertuples(index=False, name=None))
+    assert failed == {('Moto3', '-', '-'), ('MotoGP', 'ITA', 'RAC'),
+                      ('MotoGP', 'QAT', 'Q2'), ('MotoGP', 'ITA', 'Q2')}
+    assert 'No Q2 Analysis.pdf' in errors.loc[errors['session'] == 'Q2', 'error'].iloc[0]
@@ -0,0 +1,78 @@
+import json
+import time
+import pytest
+from motogpdata.cache import ResponseCache, CacheMiss
+from motogpdata.replay import ReplayServer
+from conftest import RESULTS_API
+
+CLASSIFICATIONS = 'https://www.motogp.com/api/results-front/be/results-api/session/s1/classifications'
+EVENTS = 'https://www.motogp.com/api/results-front/be/results-api/season/s22/events?finished=1'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / 'cache.sqlite'), ttls={'events': 0.05, 'live': 0.05})
+
+
+def test_ttl(cache):
+    cache.put(EVENTS, b'events')
+    cache.put(CLASSIFICATIONS, b'official')
+    assert cache.get(EVENTS) == b'events'
+    time.sleep(0.1)
+    assert cache.get(EVENTS) is None
+    assert cache.get(CLASSIFICATIONS) == b'official'
+
+
+def test_live_ttl(cache):
+    cache.put(CLASSIFICATIONS, b'provisional', immutable=False)
+    assert cache.get(CLASSIFICATIONS) == b'provisional'
+    time.sleep(0.1)
+    assert cache.get(CLASSIFICATIONS) is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_bytes=25)
+    cache.put(CLASSIFICATIONS + '?a', b'a' * 10)
+    cache.put(CLASSIFICATIONS + '?b', b'b' * 10)
+    cache.get(CLASSIFICATIONS + '?a')
+    cache.put(CLASSIFICATIONS + '?c', b'c' * 10)
+    assert cache.get(CLASSIFICATIONS + '?b') is None
+    assert cache.get(CLASSIFICATIONS + '?a') == b'a' * 10
+    assert cache.size() == 20
+
+
+def test_same_body_stored_once(cache):
+    cache.put(CLASSIFICATIONS + '?a', b'x' * 10)
+    cache.put(CLASSIFICATIONS + '?b', b'x' * 10)
+    assert cache.size() == 10
+
+
+def test_offline(server, tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    events = server.catalog(cache=cache).events('s22')
+    requests = server.requests
+
+    cache.offline = True
+    catalog = server.catalog(cache=cache)
+    assert catalog.events('s22').equals(events)
+    with pytest.raises(CacheMiss):
+        catalog.events('s23')
+    assert server.requests == requests
+
+
+def test_provisional_sessions_expire(fixtures, tmp_path):
+    url = f"{RESULTS_API}/event/s22-e0/category/s22-e0-c/sessions"
+    fixtures.save(url, json.dumps([{'id': 's22-e0-RAC', 'type': 'RAC', 'number': None, 'status': 'Provisional',
+                                    'circuit': 'Circuit QAT'}]).encode())
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), ttls={'live': 0.05})
+    with ReplayServer(fixtures.directory) as server:
+        catalog = server.catalog(cache=cache)
+        catalog.sessions('s22-e0', 's22-e0-c')
+        catalog.sessions('s22-e1', 's22-e1-c')
+
+    stored = dict(cache._db.execute("SELECT url, immutable FROM urls WHERE endpoint = 'sessions'").fetchall())
+    provisional = next(stored_url for stored_url in stored if '/s22-e0/' in stored_url)
+    assert sorted(stored.values()) == [0, 1] and stored[provisional] == 0
+    assert list(catalog._expires) == [('sessions', 's22-e0', 's22-e0-c')]
+    time.sleep(0.1)
+    assert cache.get(provisional) is None
@@ -0,0 +1,66 @@
+import json
+import os
+import pytest
+import requests
+from motogpdata.data import iter_results, event_track_info
+from motogpdata.replay import ReplayServer
+
+
+def _keys(batches):
+    return [(int(b['season'].iloc[0]), b['event_name'].iloc[0], b['session'].iloc[0]) for b in batches]
+
+
+def test_concurrent_crawl_keeps_order(server):
+    sequential = event_track_info('MotoGP', 2022, 2024, catalog=server.catalog())
+    concurrent = event_track_info('MotoGP', 2022, 2024, catalog=server.catalog(), max_workers=8)
+    assert concurrent.equals(sequential)
+    assert list(sequential['event']) == ['QAT', 'ITA', 'QAT', 'ITA']
+
+
+def test_checkpoint_resume(server, tmp_path):
+    checkpoint = str(tmp_path / 'crawl.json')
+    sessions = ['RAC', ('Q', 2)]
+    full = _keys(iter_results(seasons=[2022, 2023], sessions=sessions, catalog=server.catalog()))
+
+    stream = iter_results(seasons=[2022, 2023], sessions=sessions, checkpoint=checkpoint,
+                          catalog=server.catalog())
+    first = [next(stream) for _ in range(3)]
+    stream.close()
+    # the third batch was not consumed when the stream was closed
+    with open(checkpoint) as file:
+        assert json.load(file)['event'] == 'QAT'
+
+    rest = _keys(iter_results(seasons=[2022, 2023], sessions=sessions, checkpoint=checkpoint,
+                              catalog=server.catalog()))
+    assert _keys(first[:2]) + rest == full
+
+
+def test_checkpoint_resumes_by_value(server, tmp_path):
+    checkpoint = str(tmp_path / 'crawl.json')
+    stream = iter_results(seasons=[2022], checkpoint=checkpoint, catalog=server.catalog())
+    next(stream)
+    next(stream)
+    stream.close()
+
+    # a season added in front of the list does not shift the resume point
+    rest = _keys(iter_results(seasons=[2023, 2022], checkpoint=checkpoint, catalog=server.catalog()))
+    assert rest == [(2022, 'ITA', 'RAC')]
+
+    with pytest.raises(ValueError):
+        list(iter_results(seasons=[2023], checkpoint=checkpoint, catalog=server.catalog()))
+
+
+def test_rate_limit_is_scoped_to_the_call(server):
+    catalog = server.catalog()
+    event_track_info('MotoGP', 2022, 2023, catalog=catalog, rate_limit=1000)
+    assert catalog.rate_limiter is None
+
+
+def test_failed_request_is_not_missing_data(fixtures):
+    # a season whose categories cannot be downloaded is an error, not a season without that category
+    del fixtures.index['api.motogp.com/riders-api/season/2023/categories']
+    with open(os.path.join(fixtures.directory, 'index.json'), 'w') as file:
+        json.dump(fixtures.index, file)
+    with ReplayServer(fixtures.directory) as server:
+        with pytest.raises(requests.HTTPError):
+            event_track_info('MotoGP', 2022, 2024, catalog=server.catalog())
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from motogpdata.laptable import LapTable, compare
+
+
+@pytest.fixture
+def timesheet():
+    rng = np.random.default_rng(0)
+    rows = []
+    for rider, team, constructor, laps in [('A', 'T1', 'C1', 5), ('B', 'T1', 'C1', 5),
+                                           ('C', 'T2', 'C2', 3), ('D', 'T3', 'C1', 5)]:
+        for lap in range(1, laps + 1):
+            rows.append({'rider': rider, 'team': team, 'constructor': constructor, 'lap': lap,
+                         'laptime_sec': rng.uniform(100, 105), 't1': rng.uniform(20, 30), 't2': np.nan,
+                         't3': 30.0, 't4': 25.0, 'speed': rng.uniform(300, 350)})
+    df = pd.DataFrame(rows)
+    df.loc[df.index[7], 'laptime_sec'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('by', ['rider', 'team', 'constructor'])
+def test_laptimes_match_pivot_table(timesheet, by):
+    expected = pd.pivot_table(timesheet, values='laptime_sec', index='lap', columns=by).sort_index()
+    expected['avg_laptime'] = expected.mean(axis=1)
+    laptimes = LapTable.from_timesheet(timesheet).laptimes(by)
+    pd.testing.assert_frame_equal(laptimes.drop(columns='lap'), expected,
+                                  check_dtype=False, check_index_type=False, check_column_type=False)
+    assert (laptimes['lap'] == laptimes.index).all()
+
+
+def test_rider_stats(timesheet):
+    stats = LapTable.from_timesheet(timesheet).rider_stats()
+    grouped = timesheet.groupby('rider')
+    np.testing.assert_allclose(stats['avg_laptime'], grouped['laptime_sec'].mean())
+    np.testing.assert_allclose(stats['std_laptime'], grouped['laptime_sec'].std())
+    np.testing.assert_allclose(stats['max_speed'], grouped['speed'].max())
+    assert list(stats['team']) == ['T1', 'T1', 'T2', 'T3']
+
+
+def test_positions_and_gaps(timesheet):
+    table = LapTable.from_timesheet(timesheet)
+    # a rider's cumulative time is unknown from their first missing lap onwards
+    cumulative = np.cumsum(timesheet.pivot(index='rider', columns='lap', values='laptime_sec').to_numpy(), axis=1)
+    np.testing.assert_allclose(table.gap_to_leader(), cumulative - np.nanmin(cumulative, axis=0))
+    positions = table.positions()
+    assert np.array_equal(positions[:, 0], pd.Series(cumulative[:, 0]).rank().to_numpy())
+
+
+def test_compare(timesheet):
+    table = LapTable.from_timesheet(timesheet, name='race')
+    other = LapTable.from_timesheet(timesheet.assign(laptime_sec=timesheet['laptime_sec'] + 1), name='other')
+    compared = compare([table, other])
+    np.testing.assert_allclose(compared['other'] - compared['race'], 1)
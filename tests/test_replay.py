@@ -0,0 +1,19 @@
+from motogpdata.catalog import Catalog
+from motogpdata.handler import Season, Event
+from motogpdata.replay import Recorder, ReplayServer, _key
+
+
+def test_record_and_replay(server, tmp_path):
+    # responses downloaded through an attached recorder replay identically
+    recorder = Recorder(str(tmp_path / 'recorded'))
+    catalog = recorder.attach(server.catalog())
+    results = Event(Season(2022, catalog=catalog), 'QAT').results()
+    assert len(recorder.index) == 6
+
+    with ReplayServer(recorder.directory) as replay:
+        # the recorded urls are those of the first server
+        replay_catalog = Catalog(base_url=f"{replay.url}/{_key(catalog.base_url)}",
+                                 api_base_url=f"{replay.url}/{_key(catalog.api_base_url)}",
+                                 resources_url=f"{replay.url}/{_key(catalog.resources_url)}")
+        replayed = Event(Season(2022, catalog=replay_catalog), 'QAT').results()
+    assert replayed.equals(results)
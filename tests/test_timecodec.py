@@ -0,0 +1,28 @@
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+from motogpdata.timecodec import parse_times, parse_gaps, format_times, times2min
+
+
+def test_parse_times():
+    seconds, null = parse_times(["1'42.123", '1:42.123', '41:12.300', '1:02:03.456', '42.5', '', None])
+    assert_allclose(seconds[:5], [102.123, 102.123, 2472.3, 3723.456, 42.5])
+    assert_array_equal(null, [False] * 5 + [True] * 2)
+    assert np.isnan(seconds[5:]).all()
+
+
+def test_parse_gaps():
+    seconds, laps, null = parse_gaps(['0.000', '+1.234', '+1 Lap', '+3 Laps', '', None])
+    assert_allclose(seconds[:2], [0, 1.234])
+    assert np.isnan(seconds[2:]).all()
+    assert_array_equal(laps, [0, 0, 1, 3, 0, 0])
+    assert_array_equal(null, [False, False, False, False, True, True])
+
+
+def test_format_times():
+    formatted = format_times([102.123, 59.9996, np.nan], sep="'")
+    assert list(formatted) == ["01'42.123", "01'00.000", None]
+    assert_allclose(parse_times(format_times([102.123, 2472.3]))[0], [102.123, 2472.3])
+
+
+def test_times2min():
+    assert_allclose(times2min(['41:12.300']), [2472.3 / 60])
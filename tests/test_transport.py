@@ -0,0 +1,88 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from motogpdata.catalog import Catalog
+from motogpdata.transport import Transport
+
+
+@pytest.fixture
+def flaky():
+    # /flaky fails with 503 then 429 before answering, /down always fails, /slow answers after 0.3 s
+    hits = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                hits[self.path] = n = hits.get(self.path, 0) + 1
+            if (self.path == '/flaky' and n <= 2) or self.path == '/down':
+                status = {1: 503, 2: 429}.get(n, 500) if self.path == '/flaky' else 500
+                self.send_response(status)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if self.path == '/slow':
+                time.sleep(0.3)
+            body = b'{"ok": 1}'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", hits
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_retries(flaky):
+    url, hits = flaky
+    catalog = Catalog(transport=Transport(retries=3, backoff=0.01))
+    assert catalog.get_json(url + '/flaky') == {'ok': 1}
+    assert hits['/flaky'] == 3
+    stats = catalog.stats.requests().loc['other']
+    assert stats['requests'] == 1
+    assert stats['retries'] == 2
+    assert stats['errors'] == 0
+
+
+def test_retries_exhausted(flaky):
+    url, hits = flaky
+    catalog = Catalog(transport=Transport(retries=2, backoff=0.01))
+    with pytest.raises(requests.HTTPError):
+        catalog.get(url + '/down')
+    assert hits['/down'] == 3
+    assert catalog.stats.requests().loc['other', 'errors'] == 1
+
+
+def test_retry_after():
+    transport = Transport(max_backoff=5)
+
+    class Response:
+        headers = {'Retry-After': '2'}
+
+    assert transport._delay(0, Response()) == 2
+    Response.headers = {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    assert transport._delay(0, Response()) == 0
+    assert 0 <= transport._delay(10) <= 5
+
+
+def test_inflight_requests_are_shared(flaky):
+    url, hits = flaky
+    catalog = Catalog(transport=Transport())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(catalog.get(url + '/slow'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert hits['/slow'] == 1
+    assert results == [b'{"ok": 1}'] * 8
@@ -0,0 +1,34 @@
+import pytest
+from motogpdata.replay import ReplayServer
+from motogpdata.warehouse import Warehouse
+from conftest import classification_url
+
+pytest.importorskip('pyarrow')
+
+
+def test_incremental_sync(server, tmp_path):
+    warehouse = Warehouse(str(tmp_path / 'warehouse'), catalog=server.catalog())
+    assert warehouse.sync(seasons=[2022], session_types=['RAC']) == ['MotoGP/s22-e0', 'MotoGP/s22-e1']
+    assert warehouse.read('classifications').shape[0] == 6
+
+    # nothing new: only the seasons and events lists are downloaded again
+    requests = server.requests
+    assert warehouse.sync(seasons=[2022], session_types=['RAC']) == []
+    assert server.requests - requests == 2
+
+    # sessions not requested before are backfilled
+    assert warehouse.sync(seasons=[2022]) == ['MotoGP/s22-e0', 'MotoGP/s22-e1']
+    assert warehouse.read('classifications', session_types=['Q']).shape[0] == 12
+    assert sorted(warehouse.read('classifications')['session_type'].unique()) == ['FP', 'Q', 'RAC']
+
+
+def test_sessions_without_classification_are_not_retried(fixtures, tmp_path):
+    fixtures.save(classification_url('s22-e0-FP1'), b'{}')
+    with ReplayServer(fixtures.directory) as server:
+        warehouse = Warehouse(str(tmp_path / 'warehouse'), catalog=server.catalog())
+        warehouse.sync(seasons=[2022])
+        assert warehouse.manifest['events']['MotoGP/s22-e0']['unavailable'] == ['s22-e0-FP1']
+
+        requests = server.requests
+        assert warehouse.sync(seasons=[2022]) == []
+        assert server.requests - requests == 2
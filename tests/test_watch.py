@@ -0,0 +1,38 @@
+import json
+import shutil
+from motogpdata.handler import Season, Event
+from motogpdata.replay import Recorder, ReplayServer
+from conftest import classification, classification_url
+
+BAGNAIA, QUARTARARO, MILLER = 'Francesco Bagnaia', 'Fabio Quartararo', 'Jack Miller'
+
+
+def test_watch(fixtures, tmp_path):
+    directory = str(tmp_path / 'live')
+    shutil.copytree(fixtures.directory, directory)
+    recorder = Recorder(directory)
+    url = classification_url('s22-e0-RAC')
+    # the session as it progresses; the second payload is unchanged but served with a new etag
+    for riders, laps in [([BAGNAIA, QUARTARARO, MILLER], 1), ([BAGNAIA, QUARTARARO, MILLER], 1),
+                         ([QUARTARARO, BAGNAIA, MILLER], 2), ([QUARTARARO, BAGNAIA], 3)]:
+        recorder.save(url, json.dumps(classification(riders, laps)).encode(), append=True)
+
+    with ReplayServer(directory) as server:
+        catalog = server.catalog()
+        event = Event(Season(2022, catalog=catalog), 'QAT')
+        deltas = list(event.watch('RAC', interval=0, max_polls=6))
+        status = catalog.stats.requests().loc['classifications', 'status']
+
+    assert deltas == [
+        [{'rider': BAGNAIA, 'position': 1, 'gap': '0.000', 'laps': 1, 'status': 'INSTND'},
+         {'rider': QUARTARARO, 'position': 2, 'gap': '1.500', 'laps': 1, 'status': 'INSTND'},
+         {'rider': MILLER, 'position': 3, 'gap': '3.000', 'laps': 1, 'status': 'INSTND'}],
+        [{'rider': QUARTARARO, 'position': 1, 'gap': '0.000', 'laps': 2},
+         {'rider': BAGNAIA, 'position': 2, 'gap': '1.500', 'laps': 2},
+         {'rider': MILLER, 'laps': 2}],
+        [{'rider': QUARTARARO, 'laps': 3},
+         {'rider': BAGNAIA, 'laps': 3},
+         {'rider': MILLER, 'removed': True}],
+    ]
+    # once the last payload is reached the server answers the conditional requests with 304
+    assert status == {200: 4, 304: 2}